@@ -96,3 +96,125 @@ BEGIN
     )';
   END IF;
 END $$;
+
+-- Search indexes: trigram GIN indexes let the app's ILIKE '%q%' searches use an
+-- index. Requires the pg_trgm extension (needs CREATE privilege on the database).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'residents'
+  ) THEN
+    CREATE INDEX IF NOT EXISTS ix_residents_first_name_trgm ON public.residents USING gin (first_name gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_residents_last_name_trgm ON public.residents USING gin (last_name gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_residents_barangay_id_trgm ON public.residents USING gin (barangay_id gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_residents_address_trgm ON public.residents USING gin (address gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS ix_residents_lower_name_birth_date
+      ON public.residents (lower(first_name), lower(last_name), birth_date);
+    -- Active-only name index for the resident lists and pickers.
+    CREATE INDEX IF NOT EXISTS ix_residents_active_name
+      ON public.residents (last_name, first_name) WHERE is_archived IS false;
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'documents'
+  ) THEN
+    CREATE INDEX IF NOT EXISTS ix_documents_details_trgm ON public.documents USING gin (details gin_trgm_ops);
+    -- Keyset pagination of the document lists seeks on (issue_date, id).
+    CREATE INDEX IF NOT EXISTS ix_documents_issue_date_id ON public.documents (issue_date, id);
+    CREATE INDEX IF NOT EXISTS ix_documents_active_issue_date_id
+      ON public.documents (issue_date, id) WHERE is_archived IS false;
+  END IF;
+
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'document_types'
+  ) THEN
+    CREATE INDEX IF NOT EXISTS ix_document_types_name_trgm ON public.document_types USING gin (name gin_trgm_ops);
+  END IF;
+END $$;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'residents'
+  ) THEN
+    BEGIN
+      CREATE UNIQUE INDEX IF NOT EXISTS ux_residents_upper_barangay_id
+        ON public.residents (upper(barangay_id)) WHERE barangay_id IS NOT NULL;
+    EXCEPTION WHEN unique_violation THEN
+      -- Legacy barangay IDs that differ only by letter case: index without
+      -- the constraint so lookups are still fast.
+      CREATE INDEX IF NOT EXISTS ux_residents_upper_barangay_id
+        ON public.residents (upper(barangay_id)) WHERE barangay_id IS NOT NULL;
+    END;
+  END IF;
+END $$;
+
+-- Dashboard rollups: partial indexes over issued, non-archived documents.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'documents'
+  ) THEN
+    -- The monthly panel filters on issue_date, which an expression index on
+    -- date_trunc('month', issue_date) cannot serve; it uses
+    -- ix_documents_live_issued_issue_date below.
+    DROP INDEX IF EXISTS public.ix_documents_issued_month;
+    IF EXISTS (
+      SELECT 1 FROM pg_indexes
+      WHERE schemaname = 'public'
+        AND indexname = 'ix_documents_issued_type'
+        AND indexdef LIKE '%is_archived = false%'
+    ) THEN
+      DROP INDEX public.ix_documents_issued_type;
+    END IF;
+    CREATE INDEX IF NOT EXISTS ix_documents_issued_type
+      ON public.documents (document_type_id)
+      WHERE is_archived IS false AND status = 'issued';
+    -- Partial index for the live+issued predicate used by reports,
+    -- exports and the dashboard. Earlier builds carried INCLUDE (id, details),
+    -- which can exceed the btree row size on long details; rebuild without it.
+    IF EXISTS (
+      SELECT 1 FROM pg_indexes
+      WHERE schemaname = 'public'
+        AND indexname = 'ix_documents_live_issued_issue_date'
+        AND indexdef LIKE '%INCLUDE%'
+    ) THEN
+      DROP INDEX public.ix_documents_live_issued_issue_date;
+    END IF;
+    CREATE INDEX IF NOT EXISTS ix_documents_live_issued_issue_date
+      ON public.documents (issue_date DESC, document_type_id, resident_id)
+      WHERE is_archived IS false AND status = 'issued';
+    ANALYZE public.documents;
+  END IF;
+END $$;
+
+-- Residents inserted without a barangay ID get BRGY-<year>-<id> from the
+-- database (the app no longer issues a follow-up UPDATE for it).
+CREATE OR REPLACE FUNCTION residents_default_barangay_id() RETURNS trigger AS $$
+BEGIN
+  IF NEW.barangay_id IS NULL OR NEW.barangay_id = '' THEN
+    NEW.barangay_id := 'BRGY-' || to_char(current_date, 'YYYY') || '-'
+      || lpad(NEW.id::text, greatest(5, length(NEW.id::text)), '0');
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'public' AND table_name = 'residents'
+  ) THEN
+    DROP TRIGGER IF EXISTS trg_residents_barangay_id ON public.residents;
+    CREATE TRIGGER trg_residents_barangay_id BEFORE INSERT ON public.residents
+      FOR EACH ROW EXECUTE PROCEDURE residents_default_barangay_id();
+  END IF;
+END $$;
@@ -18,7 +18,7 @@ from flask_login import login_required, current_user
 from sqlalchemy import or_, text
 
 from .extensions import db
-from .helpers import log_action, roles_required
+from .helpers import invalidate_document_type_options, log_action, roles_required
 from .models import PasswordReset, TransactionLog, User, LoginMfaCode, Document, DocumentType
 from .forms import EditUserForm, UserForm, DeleteForm, DocumentTypeForm
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -139,7 +139,7 @@ def audit_logs():
     """View recent audit log entries."""
     q = (request.args.get("q") or "").strip()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
     query = TransactionLog.query.outerjoin(User)
     if q:
         like = f"%{q}%"
@@ -157,7 +157,7 @@ def list_users():
     """Display a list of all user accounts for administrators."""
     q = (request.args.get("q") or "").strip()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
     query = User.query
     if q:
@@ -280,7 +280,7 @@ def delete_user(user_id: int):
 @roles_required("admin")
 def list_document_types():
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
     query = DocumentType.query.order_by(DocumentType.name.asc())
     pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
     document_types = pagination.items
@@ -307,6 +307,7 @@ def add_document_type():
         )
         db.session.add(dt)
         db.session.commit()
+        invalidate_document_type_options()
         log_action("Created document type", entity_type="document_type", entity_id=dt.id, meta={"name": dt.name})
         flash("Document type added.", "success")
         return redirect(url_for("admin.list_document_types"))
@@ -325,6 +326,7 @@ def edit_document_type(type_id: int):
         dt.template_path = form.template_path.data or None
         dt.requires_photo = bool(form.requires_photo.data)
         db.session.commit()
+        invalidate_document_type_options()
         log_action("Updated document type", entity_type="document_type", entity_id=dt.id, meta={"name": dt.name})
         flash("Document type updated.", "success")
         return redirect(url_for("admin.list_document_types"))
@@ -342,6 +344,7 @@ def delete_document_type(type_id: int):
         return redirect(url_for("admin.list_document_types"))
     db.session.delete(dt)
     db.session.commit()
+    invalidate_document_type_options()
     log_action("Deleted document type", entity_type="document_type", entity_id=type_id, meta={"name": dt.name})
     flash("Document type deleted.", "success")
     return redirect(url_for("admin.list_document_types"))
@@ -19,6 +19,7 @@ from datetime import date as dt_date, datetime, timedelta, timezone
 import click
 
 from flask import Flask, flash, g, jsonify, redirect, request, session, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFError
 from flask_login import current_user, logout_user
@@ -27,7 +28,7 @@ from werkzeug.exceptions import HTTPException
 
 from .config import DevelopmentConfig
 from .extensions import csrf, db, login_manager, mail
-from sqlalchemy import inspect, text
+from sqlalchemy import event, inspect, text
 
 # Optional: load environment variables from a .env file if present.
 # This makes local setup much smoother and avoids "role USER does not exist"
@@ -36,11 +37,36 @@ try:
     from dotenv import load_dotenv
 except Exception:  # pragma: no cover
     load_dotenv = None
+# Optional: orjson speeds up jsonify/get_json; Flask's stdlib provider is the fallback.
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
 from .routes import main_bp
 from .auth import auth_bp
 from .admin import admin_bp
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """``app.json`` backed by orjson, keeping Flask's output rules.
+
+    Keys are sorted, ``indent`` (debug responses) maps to two-space
+    indentation, and dates/datetimes are still handed to Flask's ``default``
+    so they keep the HTTP-date format clients already parse.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app(config_class=DevelopmentConfig):
     """
     Application factory.  Creates and configures the Flask app instance.
@@ -56,7 +82,11 @@ def create_app(config_class=DevelopmentConfig):
         load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=False)
 
     app = Flask(__name__)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
     app.config.from_object(config_class)
+    # Resolve once so list views can read the page size without coercing it.
+    app.config["DEFAULT_PAGE_SIZE"] = int(app.config.get("DEFAULT_PAGE_SIZE", 20))
 
     # Logging configuration
     level_name = str(app.config.get("LOG_LEVEL", "INFO")).upper()
@@ -112,7 +142,14 @@ def create_app(config_class=DevelopmentConfig):
             args["page"] = page
             return url_for(request.endpoint, **args)
 
-        return {"pagination_url": pagination_url}
+        def page_link(page_args: dict):
+            args = request.args.to_dict(flat=True)
+            for key in ("page", "after", "before"):
+                args.pop(key, None)
+            args.update(page_args)
+            return url_for(request.endpoint, **args)
+
+        return {"pagination_url": pagination_url, "page_link": page_link}
 
     @app.before_request
     def assign_request_id():
@@ -276,6 +313,25 @@ def create_app(config_class=DevelopmentConfig):
         # models that have been imported.
         from . import models
 
+        if app.testing and db.engine.dialect.name == "sqlite":
+            # Test databases are throwaway: skip fsyncs and keep temp tables
+            # and the rollback journal in RAM.
+            @event.listens_for(db.engine, "connect")
+            def _set_test_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA synchronous=OFF")
+                cursor.execute("PRAGMA journal_mode=MEMORY")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+                cursor.close()
+                # Let SQLAlchemy issue BEGIN itself so SAVEPOINTs nest inside
+                # the test's outer transaction; pysqlite's own transaction
+                # handling would commit when the first SAVEPOINT is released.
+                dbapi_connection.isolation_level = None
+
+            @event.listens_for(db.engine, "begin")
+            def _begin_test_sqlite_transaction(conn):
+                conn.exec_driver_sql("BEGIN")
+
         # Validate DB connectivity early so failures are clear.
         try:
             db.engine.connect().close()
@@ -306,6 +362,7 @@ def create_app(config_class=DevelopmentConfig):
             db.session.execute(text(sql))
             db.session.commit()
 
+        trigram_available = False
         if db.engine.dialect.name == "postgresql":
             # -----------------------------------------------------------------
             # Ensure core tables exist (idempotent)
@@ -346,10 +403,43 @@ def create_app(config_class=DevelopmentConfig):
                     _exec_try("ALTER TABLE residents ADD COLUMN IF NOT EXISTS archived_by_id INTEGER;")
                 insp = inspect(db.engine)
 
+                # Database-side default for auto-generated barangay IDs.
+                for statement in models.RESIDENT_BARANGAY_ID_DDL["postgresql"]:
+                    _exec_try(statement)
+
                 # Indexes for faster search/sort
                 _exec_try("CREATE INDEX IF NOT EXISTS ix_residents_last_name ON residents (last_name);")
                 _exec_try("CREATE INDEX IF NOT EXISTS ix_residents_barangay_id ON residents (barangay_id);")
 
+                # Trigram indexes so the unanchored ILIKE '%q%' searches can use an
+                # index instead of a sequential scan. Needs pg_trgm; if the role may
+                # not create extensions these are skipped and search still works.
+                _exec_try("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                for col in ("first_name", "last_name", "barangay_id", "address"):
+                    _exec_try(
+                        f"CREATE INDEX IF NOT EXISTS ix_residents_{col}_trgm "
+                        f"ON residents USING gin ({col} gin_trgm_ops);"
+                    )
+                # Case-insensitive duplicate checks in add/edit resident.
+                # The unique barangay_id index fails on legacy case-variant
+                # duplicates; fall back to a plain index under the same name.
+                _exec_try(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ux_residents_upper_barangay_id "
+                    "ON residents (upper(barangay_id)) WHERE barangay_id IS NOT NULL;"
+                )
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ux_residents_upper_barangay_id "
+                    "ON residents (upper(barangay_id)) WHERE barangay_id IS NOT NULL;"
+                )
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ix_residents_lower_name_birth_date "
+                    "ON residents (lower(first_name), lower(last_name), birth_date);"
+                )
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ix_residents_active_name "
+                    "ON residents (last_name, first_name) WHERE is_archived IS false;"
+                )
+
             # --- document_types: ensure the table exists (older DBs may not have it) ---
             if not insp.has_table("document_types"):
                 _exec_try(
@@ -373,6 +463,11 @@ def create_app(config_class=DevelopmentConfig):
                 if "requires_photo" not in dt_cols:
                     _exec_try("ALTER TABLE document_types ADD COLUMN IF NOT EXISTS requires_photo BOOLEAN NOT NULL DEFAULT FALSE;")
                 insp = inspect(db.engine)
+            # Document list search matches type names with ILIKE '%q%' too.
+            _exec_try(
+                "CREATE INDEX IF NOT EXISTS ix_document_types_name_trgm "
+                "ON document_types USING gin (name gin_trgm_ops);"
+            )
 
             # --- users: ensure the table exists (required for login) ---
             if not insp.has_table("users"):
@@ -579,9 +674,89 @@ def create_app(config_class=DevelopmentConfig):
 
                 # Indexes for faster search/sort
                 _exec_try("CREATE INDEX IF NOT EXISTS ix_documents_issue_date ON documents (issue_date);")
+                _exec_try("CREATE INDEX IF NOT EXISTS ix_documents_issue_date_id ON documents (issue_date, id);")
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ix_documents_active_issue_date_id "
+                    "ON documents (issue_date, id) WHERE is_archived IS false;"
+                )
                 _exec_try("CREATE INDEX IF NOT EXISTS ix_documents_resident_id ON documents (resident_id);")
                 _exec_try("CREATE INDEX IF NOT EXISTS ix_documents_document_type_id ON documents (document_type_id);")
+                # Partial index for the dashboard's per-type rollup. The monthly
+                # panel filters on issue_date, which the expression index on
+                # date_trunc('month', issue_date) could not serve; it is read
+                # from ix_documents_live_issued_issue_date below instead. An
+                # issued_type index written with "= false" is rebuilt so its
+                # predicate matches the "IS false" the queries emit.
+                _exec_try("DROP INDEX IF EXISTS ix_documents_issued_month;")
+                _exec_try(
+                    """
+                    DO $$
+                    BEGIN
+                        IF EXISTS (
+                            SELECT 1 FROM pg_indexes
+                            WHERE indexname = 'ix_documents_issued_type'
+                              AND indexdef LIKE '%is_archived = false%'
+                        ) THEN
+                            DROP INDEX ix_documents_issued_type;
+                        END IF;
+                    END $$;
+                    """
+                )
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ix_documents_issued_type "
+                    "ON documents (document_type_id) "
+                    "WHERE is_archived IS false AND status = 'issued';"
+                )
+                # Partial index for the live+issued predicate shared by the
+                # reports list, exports and dashboard; ANALYZE once on creation
+                # so the planner starts using it right away. Earlier builds
+                # carried INCLUDE (id, details); an unbounded Text column can
+                # exceed the btree row size, so drop that form and rebuild.
+                _exec_try(
+                    """
+                    DO $$
+                    BEGIN
+                        IF EXISTS (
+                            SELECT 1 FROM pg_indexes
+                            WHERE indexname = 'ix_documents_live_issued_issue_date'
+                              AND indexdef LIKE '%INCLUDE%'
+                        ) THEN
+                            DROP INDEX ix_documents_live_issued_issue_date;
+                        END IF;
+                    END $$;
+                    """
+                )
+                try:
+                    dindexes = {i["name"] for i in insp.get_indexes("documents")}
+                except Exception:
+                    dindexes = set()
+                if "ix_documents_live_issued_issue_date" not in dindexes:
+                    _exec_try(
+                        "CREATE INDEX IF NOT EXISTS ix_documents_live_issued_issue_date "
+                        "ON documents (issue_date DESC, document_type_id, resident_id) "
+                        "WHERE is_archived IS false AND status = 'issued';"
+                    )
+                    _exec_try("ANALYZE documents;")
+                _exec_try("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                _exec_try(
+                    "CREATE INDEX IF NOT EXISTS ix_documents_details_trgm "
+                    "ON documents USING gin (details gin_trgm_ops);"
+                )
+
+            # Fuzzy name search needs pg_trgm; the role may not be allowed to create it.
+            try:
+                trigram_available = bool(
+                    db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+                )
+            except Exception:
+                db.session.rollback()
+                trigram_available = False
+
+        app.config["SEARCH_TRIGRAM"] = bool(app.config.get("SEARCH_TRIGRAM")) and trigram_available
 
+        if db.engine.dialect.name == "sqlite" and insp.has_table("residents"):
+            for statement in models.RESIDENT_BARANGAY_ID_DDL["sqlite"]:
+                _exec(statement)
 
         # Seed common document types (safe to run repeatedly)
         DEFAULT_DOCUMENT_TYPES = [
@@ -700,6 +875,38 @@ def create_app(config_class=DevelopmentConfig):
             subprocess.run(cmd, check=True)
             print(f"PostgreSQL restored from: {backup_path}")
 
+    @app.cli.command("regenerate-pdfs")
+    @click.option("--all", "regenerate_all", is_flag=True, help="Regenerate every issued document, not only missing files.")
+    @click.option("--workers", type=int, default=None, help="Worker processes (defaults to the CPU count).")
+    def regenerate_pdfs_command(regenerate_all: bool, workers: int | None):
+        """Regenerate PDFs for issued documents using parallel workers."""
+        from .models import Document
+        from .pdf_utils import generate_documents_bulk
+
+        static_root = os.path.join(app.root_path, "static")
+        docs = Document.query.filter(
+            Document.status == "issued",
+            Document.is_archived.is_(False),
+        ).all()
+        if not regenerate_all:
+            docs = [
+                d for d in docs
+                if not d.file_path or not os.path.exists(os.path.join(static_root, d.file_path))
+            ]
+        if not docs:
+            print("No documents need regeneration.")
+            return
+
+        results = generate_documents_bulk([d.id for d in docs], max_workers=workers)
+        generated = 0
+        for doc in docs:
+            rel_path = results.get(doc.id)
+            if rel_path:
+                doc.file_path = rel_path
+                generated += 1
+        db.session.commit()
+        print(f"Regenerated {generated} of {len(docs)} document PDF(s).")
+
     def _add_months(value: dt_date, months: int) -> dt_date:
         month = value.month - 1 + months
         year = value.year + month // 12
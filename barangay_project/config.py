@@ -14,6 +14,8 @@ databases, set the `DATABASE_URL` environment variable before running
 import os
 from datetime import timedelta
 
+from sqlalchemy.pool import StaticPool
+
 
 class Config:
     """Base configuration with default settings."""
@@ -40,9 +42,29 @@ class Config:
     # CSRF: keep tokens valid (avoids "token expired" during long admin sessions)
     WTF_CSRF_TIME_LIMIT = None
 
+    # werkzeug hash method for new passwords (existing hashes keep verifying
+    # whatever method they were made with).
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+
     # Pagination defaults
     DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 20))
 
+    # Fuzzy (pg_trgm similarity) matching on resident names in searches.
+    # Only takes effect on PostgreSQL when the pg_trgm extension is installed.
+    SEARCH_TRIGRAM = os.environ.get("SEARCH_TRIGRAM", "True") == "True"
+
+    # Opt-in: render issued-document PDFs on background threads instead of in
+    # the issue request. Queued renders live only in this process (lost on
+    # restart, invisible to other workers); a missing file is regenerated by
+    # the download route when someone clicks Print.
+    PDF_RENDER_ASYNC = os.environ.get("PDF_RENDER_ASYNC", "False") == "True"
+    PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", 2))
+    # Let the front-end server send PDF downloads from disk. USE_X_SENDFILE is
+    # Flask's own switch (Apache/lighttpd X-Sendfile); X_ACCEL_REDIRECT_PREFIX
+    # is an nginx `internal` location aliased to the static folder.
+    USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "False") == "True"
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get("X_ACCEL_REDIRECT_PREFIX", "")
+
     # Ops / logging / backups
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
     LOG_JSON = os.environ.get("LOG_JSON", "True") == "True"
@@ -134,4 +156,12 @@ class TestingConfig(Config):
     """Configuration for testing (uses an in-memory SQLite DB)."""
 
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    # One shared connection, so every session (and the test client) sees the same in-memory DB.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": StaticPool,
+        "connect_args": {"check_same_thread": False},
+    }
+    PDF_RENDER_ASYNC = False
+    # A single pbkdf2 round: fixtures hash passwords constantly and nothing here needs the work factor.
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1"
@@ -11,16 +11,18 @@ from __future__ import annotations
 import base64
 import os
 import re
+import time
 import uuid
 from functools import wraps
 
 from flask import abort, current_app, has_request_context, request
 from flask_login import current_user
 from flask_mail import Message
+from sqlalchemy import insert
 from werkzeug.utils import secure_filename
 
 from .extensions import db
-from .models import TransactionLog
+from .models import DocumentType, TransactionLog
 
 
 def roles_required(*roles: str):
@@ -82,14 +84,7 @@ def log_action(
     """
     # Ensure that we only log actions for authenticated users
     if current_user.is_authenticated:
-        ip = get_client_ip()
-        ua = None
-        if has_request_context():
-            try:
-                ua = (request.user_agent.string or "")[:255]
-            except Exception:
-                ua = None
-
+        ip, ua = _request_origin()
         log = TransactionLog(
             user_id=current_user.id,
             action=action,
@@ -103,6 +98,56 @@ def log_action(
         db.session.commit()
 
 
+def log_actions(entries: list[dict]) -> None:
+    """Record several actions with one multi-row INSERT.
+
+    Each entry holds the keyword arguments `log_action` takes (``action``
+    plus optional ``entity_type``/``entity_id``/``meta``); entries should
+    all use the same keys.
+    """
+    if not entries or not current_user.is_authenticated:
+        return
+    ip, ua = _request_origin()
+    common = {"user_id": current_user.id, "ip_address": ip, "user_agent": ua}
+    db.session.execute(insert(TransactionLog), [{**common, **entry} for entry in entries])
+    db.session.commit()
+
+
+def _request_origin() -> tuple[str | None, str | None]:
+    """Client IP and truncated user agent for audit rows."""
+    ip = get_client_ip()
+    ua = None
+    if has_request_context():
+        try:
+            ua = (request.user_agent.string or "")[:255]
+        except Exception:
+            ua = None
+    return ip, ua
+
+
+DOCUMENT_TYPE_OPTIONS_TTL_SECONDS = 300
+
+
+def document_type_options() -> list:
+    """Return ``(id, name)`` rows of all document types, ordered by name.
+
+    Used to fill filter dropdowns on hot pages. The rows are cached on the app
+    for a few minutes; admin edits call `invalidate_document_type_options`.
+    """
+    cached = current_app.extensions.get("document_type_options")
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        return cached[1]
+    rows = db.session.query(DocumentType.id, DocumentType.name).order_by(DocumentType.name.asc()).all()
+    current_app.extensions["document_type_options"] = (now + DOCUMENT_TYPE_OPTIONS_TTL_SECONDS, rows)
+    return rows
+
+
+def invalidate_document_type_options() -> None:
+    """Drop the cached document type rows after a create/edit/delete."""
+    current_app.extensions.pop("document_type_options", None)
+
+
 def _send_otp_email(user, code: str, subject: str, body: str) -> None:
     """Send a one-time code email with a custom subject/body."""
     # Retrieve the mail extension from the current app context
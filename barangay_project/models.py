@@ -6,7 +6,9 @@ Each model corresponds to a table in the PostgreSQL database.  Relationships
 between models are declared via foreign keys and backrefs.  Additional
 optional fields can be added to meet specific barangay requirements.
 """
+from flask import current_app, has_app_context
 from flask_login import UserMixin
+from sqlalchemy import DDL, FetchedValue, event
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from .extensions import db
@@ -24,12 +26,38 @@ class Resident(db.Model):
     __table_args__ = (
         db.Index("ix_residents_last_name", "last_name"),
         db.Index("ix_residents_barangay_id", "barangay_id"),
+        # Expression indexes matching the case-insensitive duplicate checks in
+        # add/edit resident, so those lookups are index probes.
+        db.Index(
+            "ux_residents_upper_barangay_id",
+            db.text("upper(barangay_id)"),
+            unique=True,
+            postgresql_where=db.text("barangay_id IS NOT NULL"),
+            sqlite_where=db.text("barangay_id IS NOT NULL"),
+        ),
+        db.Index(
+            "ix_residents_lower_name_birth_date",
+            db.text("lower(first_name)"),
+            db.text("lower(last_name)"),
+            "birth_date",
+        ),
+        # Active-only index for the resident lists and pickers, which always
+        # filter out archived rows and sort by name. The predicate is spelled
+        # like the queries' `is_archived.is_(False)` so planners can match it.
+        db.Index(
+            "ix_residents_active_name",
+            "last_name",
+            "first_name",
+            postgresql_where=db.text("is_archived IS false"),
+            sqlite_where=db.text("is_archived IS 0"),
+        ),
     )
     id = db.Column(db.Integer, primary_key=True)
     # Human-friendly identifier for the resident (optional but useful for
     # barangay ID issuance and searching).
     # Example format used by the app when auto-generated: BRGY-2026-00001
-    barangay_id = db.Column(db.String(50), unique=True, nullable=True)
+    # (filled in by the database on INSERT, see RESIDENT_BARANGAY_ID_DDL).
+    barangay_id = db.Column(db.String(50), unique=True, nullable=True, server_default=FetchedValue())
     first_name = db.Column(db.String(100), nullable=False)
     middle_name = db.Column(db.String(100), nullable=True)
     last_name = db.Column(db.String(100), nullable=False)
@@ -57,6 +85,52 @@ class Resident(db.Model):
         return f"<Resident {self.last_name}, {self.first_name}>"
 
 
+# Residents inserted without a barangay ID get BRGY-<year>-<id, 5+ digits> from
+# the database itself, so creating a resident is a single INSERT. PostgreSQL
+# fills it in a BEFORE trigger; SQLite (tests/dev) can't modify NEW there, so
+# it uses an AFTER trigger. Also applied to existing databases at startup.
+RESIDENT_BARANGAY_ID_DDL = {
+    "postgresql": (
+        """
+        CREATE OR REPLACE FUNCTION residents_default_barangay_id() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.barangay_id IS NULL OR NEW.barangay_id = '' THEN
+                NEW.barangay_id := 'BRGY-' || to_char(current_date, 'YYYY') || '-'
+                    || lpad(NEW.id::text, greatest(5, length(NEW.id::text)), '0');
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS trg_residents_barangay_id ON residents",
+        """
+        CREATE TRIGGER trg_residents_barangay_id BEFORE INSERT ON residents
+        FOR EACH ROW EXECUTE PROCEDURE residents_default_barangay_id()
+        """,
+    ),
+    "sqlite": (
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_residents_barangay_id AFTER INSERT ON residents
+        WHEN NEW.barangay_id IS NULL OR NEW.barangay_id = ''
+        BEGIN
+            UPDATE residents
+            SET barangay_id = 'BRGY-' || strftime('%Y', 'now', 'localtime') || '-' || printf('%05d', NEW.id)
+            WHERE id = NEW.id;
+        END
+        """,
+    ),
+}
+
+for _dialect, _statements in RESIDENT_BARANGAY_ID_DDL.items():
+    for _statement in _statements:
+        # DDL() applies %-formatting to its text, so escape literal percent signs.
+        event.listen(
+            Resident.__table__,
+            "after_create",
+            DDL(_statement.replace("%", "%%")).execute_if(dialect=_dialect),
+        )
+
+
 class DocumentType(db.Model):
     """
     Defines a type of document that the barangay can issue.  Common examples
@@ -91,6 +165,15 @@ class Document(db.Model):
     __tablename__ = "documents"
     __table_args__ = (
         db.Index("ix_documents_issue_date", "issue_date"),
+        # Keyset pagination of the document lists seeks on (issue_date, id).
+        db.Index("ix_documents_issue_date_id", "issue_date", "id"),
+        db.Index(
+            "ix_documents_active_issue_date_id",
+            "issue_date",
+            "id",
+            postgresql_where=db.text("is_archived IS false"),
+            sqlite_where=db.text("is_archived IS 0"),
+        ),
         db.Index("ix_documents_resident_id", "resident_id"),
         db.Index("ix_documents_document_type_id", "document_type_id"),
     )
@@ -146,7 +229,8 @@ class User(UserMixin, db.Model):
         Args:
             password: The plaintext password to hash and store.
         """
-        self.password_hash = generate_password_hash(password)
+        method = current_app.config.get("PASSWORD_HASH_METHOD", "scrypt") if has_app_context() else "scrypt"
+        self.password_hash = generate_password_hash(password, method=method)
 
     def check_password(self, password: str) -> bool:
         """Check a plaintext password against the stored hash.
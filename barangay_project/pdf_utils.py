@@ -9,44 +9,93 @@ Business Clearance, Residency, etc.).
 
 from __future__ import annotations
 
+import math
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 from datetime import date
 from calendar import monthrange
-from xml.sax.saxutils import escape as xml_escape
 
 from .time_utils import utcnow
 from typing import Optional
 
-from flask import current_app
+from flask import Flask, current_app
 from .extensions import db
-from .models import User
+from .models import Document, User
 from reportlab.lib.pagesizes import LETTER, A4
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import simpleSplit, ImageReader
 from reportlab.platypus import Paragraph
 
+from PIL import Image, ImageOps
 from pypdf import PdfReader, PdfWriter
 
+# Per-thread scratch buffers reused across PDF builds.
+_local = threading.local()
+# Cached template readers share one underlying file stream; cloning a page
+# reads from it, so serialize that step across threads.
+_template_lock = threading.Lock()
+
+# Escapes Paragraph markup in a single C-level pass (same characters as
+# xml.sax.saxutils.escape, which chains three str.replace calls).
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+# Print resolution for resident photos cropped to their box.
+_PHOTO_DPI = 300
+
+# Hot paths build file paths with f-strings; every component joined this way
+# is relative, so os.path.join's absolute-path handling is not needed.
+_SEP = os.sep
+
+_RESIDENCY_BODY_STYLE = ParagraphStyle(
+    name="ResidencyBody",
+    fontName="Times-Roman",
+    fontSize=12,
+    leading=16,
+    alignment=TA_JUSTIFY,
+    firstLineIndent=18,
+)
+
 
 def _safe_filename(text: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in text).strip("_")
 
 
+@lru_cache(maxsize=4096)
+def _string_width(text: str, font_name: str, font_size: float) -> float:
+    """Memoized font-metric width (the same labels/lines recur across documents)."""
+    return stringWidth(text, font_name, font_size)
+
+
+def _set_font(c: canvas.Canvas, font_name: str, font_size: float) -> None:
+    """Set the canvas font, skipping the call when it is already active.
+
+    ``Canvas.setFont`` writes a ``Tf`` operator to the content stream every
+    time, even if nothing changed.
+    """
+    state = (font_name, font_size)
+    if getattr(c, "_cur_font", None) != state:
+        c.setFont(font_name, font_size)
+        c._cur_font = state
+
+
 def _resident_display_name(resident) -> str:
     parts = [resident.first_name, resident.middle_name, resident.last_name]
     return " ".join([p for p in parts if p])
 
 
 def _draw_header(c: canvas.Canvas, title: str) -> None:
-    c.setFont("Helvetica-Bold", 14)
+    _set_font(c, "Helvetica-Bold", 14)
     c.drawCentredString(4.25 * inch, 10.5 * inch, "REPUBLIC OF THE PHILIPPINES")
-    c.setFont("Helvetica", 11)
+    _set_font(c, "Helvetica", 11)
     c.drawCentredString(4.25 * inch, 10.25 * inch, "BARANGAY DOCUMENT MANAGEMENT SYSTEM")
-    c.setFont("Helvetica-Bold", 16)
+    _set_font(c, "Helvetica-Bold", 16)
     c.drawCentredString(4.25 * inch, 9.85 * inch, title)
 
     # light divider
@@ -81,7 +130,7 @@ def _resolve_photo_abs_path(photo_path: str) -> Optional[str]:
         rel = rel[len("static/"):]
 
     # 1) Resolve relative to Flask static folder.
-    static_candidate = os.path.join(current_app.static_folder, rel)
+    static_candidate = f"{current_app.static_folder}{_SEP}{rel}"
     if os.path.exists(static_candidate):
         return static_candidate
 
@@ -95,12 +144,12 @@ def _resolve_photo_abs_path(photo_path: str) -> Optional[str]:
     rel2 = rel
     if rel2.startswith("uploads/"):
         rel2 = rel2[len("uploads/"):]
-    uploads_candidate = os.path.join(uploads_root, rel2)
+    uploads_candidate = f"{uploads_root}{_SEP}{rel2}"
     if os.path.exists(uploads_candidate):
         return uploads_candidate
 
     # 3) As a last resort, try joining app root.
-    root_candidate = os.path.join(current_app.root_path, rel)
+    root_candidate = f"{current_app.root_path}{_SEP}{rel}"
     if os.path.exists(root_candidate):
         return root_candidate
 
@@ -132,22 +181,19 @@ def _draw_resident_photo(
         target_h = max(1, h - (padding * 2))
         if crop_to_fill:
             try:
-                from PIL import Image
-
                 img = Image.open(photo_abs)
                 if img.mode not in ("RGB", "RGBA"):
                     img = img.convert("RGB")
-                src_w, src_h = img.size
-                target_ratio = target_w / target_h
-                src_ratio = src_w / src_h
-                if src_ratio > target_ratio:
-                    new_w = int(src_h * target_ratio)
-                    left = int((src_w - new_w) / 2)
-                    img = img.crop((left, 0, left + new_w, src_h))
-                else:
-                    new_h = int(src_w / target_ratio)
-                    top = int((src_h - new_h) / 2)
-                    img = img.crop((0, top, src_w, top + new_h))
+                # Center-crop and resample in one pass, straight to the pixel size
+                # the box prints at, so ReportLab embeds an exactly-sized image.
+                px_w = max(1, round(target_w * _PHOTO_DPI / 72))
+                px_h = max(1, round(target_h * _PHOTO_DPI / 72))
+                img = ImageOps.fit(
+                    img,
+                    (px_w, px_h),
+                    method=Image.Resampling.LANCZOS,
+                    centering=(0.5, 0.5),
+                )
                 c.drawImage(
                     ImageReader(img),
                     x + padding,
@@ -176,7 +222,7 @@ def _draw_resident_photo(
 
 
 def _draw_signature_block(c: canvas.Canvas, y: float, left_title: str = "Barangay Captain") -> None:
-    c.setFont("Helvetica", 10)
+    _set_font(c, "Helvetica", 10)
     c.drawString(0.9 * inch, y, "Prepared by:")
     c.line(0.9 * inch, y - 0.25 * inch, 3.25 * inch, y - 0.25 * inch)
     c.drawString(0.9 * inch, y - 0.42 * inch, "Barangay Secretary")
@@ -237,7 +283,7 @@ def _draw_underlined_text(
             break
         size -= 1
 
-    c.setFont(font_name, size)
+    _set_font(c, font_name, size)
     c.drawString(x, y, text)
     width = c.stringWidth(text, font_name, size)
     c.setLineWidth(0.8)
@@ -259,19 +305,22 @@ def _draw_paragraph(
     leading = base_style.leading
 
     while True:
-        style = ParagraphStyle(
-            name=base_style.name,
-            parent=base_style,
-            fontName=base_style.fontName,
-            fontSize=font_size,
-            leading=leading,
-            alignment=base_style.alignment,
-            leftIndent=base_style.leftIndent,
-            rightIndent=base_style.rightIndent,
-            firstLineIndent=base_style.firstLineIndent,
-            spaceBefore=base_style.spaceBefore,
-            spaceAfter=base_style.spaceAfter,
-        )
+        if font_size == base_style.fontSize and leading == base_style.leading:
+            style = base_style
+        else:
+            style = ParagraphStyle(
+                name=base_style.name,
+                parent=base_style,
+                fontName=base_style.fontName,
+                fontSize=font_size,
+                leading=leading,
+                alignment=base_style.alignment,
+                leftIndent=base_style.leftIndent,
+                rightIndent=base_style.rightIndent,
+                firstLineIndent=base_style.firstLineIndent,
+                spaceBefore=base_style.spaceBefore,
+                spaceAfter=base_style.spaceAfter,
+            )
         para = Paragraph(text, style)
         _, height = para.wrap(max_width, max_height)
         if height <= max_height or font_size <= 9:
@@ -287,16 +336,23 @@ def _template_pdf_path(filename: str) -> str | None:
     return abs_path if os.path.exists(abs_path) else None
 
 
+@lru_cache(maxsize=8)
+def _template_reader(template_path: str, mtime: float) -> PdfReader:
+    """Parsed template PDF, cached per file version (``mtime`` is part of the key)."""
+    return PdfReader(template_path)
+
+
 def _merge_pdf_template(template_path: str, overlay_pdf: BytesIO, output_path: str) -> None:
     overlay_pdf.seek(0)
-    template_reader = PdfReader(template_path)
+    template_reader = _template_reader(template_path, os.path.getmtime(template_path))
     overlay_reader = PdfReader(overlay_pdf)
 
-    template_page = template_reader.pages[0]
-    template_page.merge_page(overlay_reader.pages[0])
-
+    # add_page clones the template page into the writer, so merging onto the
+    # returned copy leaves the cached reader untouched for the next document.
     writer = PdfWriter()
-    writer.add_page(template_page)
+    with _template_lock:
+        page = writer.add_page(template_reader.pages[0])
+    page.merge_page(overlay_reader.pages[0])
     with open(output_path, "wb") as f:
         writer.write(f)
 
@@ -307,19 +363,28 @@ def _build_residency_overlay(doc) -> BytesIO:
     if not issue_dt:
         issue_dt = date.today()
 
-    name = xml_escape(_resident_display_name(resident))
-    birth_date = xml_escape(_format_date_long(resident.birth_date))
-    marital = xml_escape(resident.marital_status or "N/A")
-    address = xml_escape(resident.address or "N/A")
-    purpose = xml_escape((doc.details or "").strip() or "N/A")
+    name = (_resident_display_name(resident) or "").translate(_XML_ESCAPE)
+    birth_date = _format_date_long(resident.birth_date).translate(_XML_ESCAPE)
+    marital = (resident.marital_status or "N/A").translate(_XML_ESCAPE)
+    address = (resident.address or "N/A").translate(_XML_ESCAPE)
+    purpose = ((doc.details or "").strip() or "N/A").translate(_XML_ESCAPE)
 
     issued_on = _format_date_long(issue_dt)
     valid_until = _format_date_long(_add_months(issue_dt, 6))
     prepared_by = _resolve_prepared_by(doc)
     reference_no = _build_reference_no(doc, issue_dt)
 
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
+    # Reuse this thread's scratch buffer instead of allocating one per document.
+    buffer = getattr(_local, "overlay_buf", None)
+    if buffer is None:
+        buffer = _local.overlay_buf = BytesIO()
+    buffer.seek(0)
+    buffer.truncate(0)
+    # The overlay is only an intermediate stream for the template merge, so skip
+    # zlib and the info-dict strings; the final written PDF is what matters.
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=0)
+    c.setCreator("")
+    c.setProducer("")
 
     c.setFillColorRGB(0, 0, 0)
     c.setStrokeColorRGB(0, 0, 0)
@@ -346,14 +411,7 @@ def _build_residency_overlay(doc) -> BytesIO:
     prep_x = 360.0
     prep_y = 50.0
 
-    body_style = ParagraphStyle(
-        name="ResidencyBody",
-        fontName="Times-Roman",
-        fontSize=12,
-        leading=16,
-        alignment=TA_JUSTIFY,
-        firstLineIndent=18,
-    )
+    body_style = _RESIDENCY_BODY_STYLE
 
     paragraph_1 = (
         "This is to certify that Mr./Ms./Mrs. "
@@ -371,9 +429,17 @@ def _build_residency_overlay(doc) -> BytesIO:
         "This certify further that she/he has no derogatory record and a person of good moral character."
     )
 
-    paragraph_issue = (
-        f"Issued this <b><u>{issued_on}</u></b>, at Barangay Krus Na Ligas, District IV, Quezon City."
+    issue_prefix = "Issued this "
+    issue_suffix = ", at Barangay Krus Na Ligas, District IV, Quezon City."
+    paragraph_issue = f"{issue_prefix}<b><u>{issued_on}</u></b>{issue_suffix}"
+    # This sentence practically always fits on one line; when it does, draw it
+    # directly instead of running it through Platypus.
+    issue_width = (
+        _string_width(issue_prefix, "Times-Roman", 12)
+        + _string_width(issued_on, "Times-Bold", 12)
+        + _string_width(issue_suffix, "Times-Roman", 12)
     )
+    issue_single_line = issue_width <= max_width - body_style.firstLineIndent
 
     def _measure_height(text: str, style: ParagraphStyle, width: float) -> float:
         para = Paragraph(text, style)
@@ -386,7 +452,7 @@ def _build_residency_overlay(doc) -> BytesIO:
         _measure_height(paragraph_1, body_style, max_width),
         _measure_height(paragraph_undersigned, body_style, max_width),
         _measure_height(paragraph_2, body_style, max_width),
-        _measure_height(paragraph_issue, body_style, max_width),
+        body_style.leading if issue_single_line else _measure_height(paragraph_issue, body_style, max_width),
     ]
     total_paragraph_height = sum(paragraph_heights) + (paragraph_gap * 3)
 
@@ -395,7 +461,7 @@ def _build_residency_overlay(doc) -> BytesIO:
     heading_y = bottom_target + heading_gap + total_paragraph_height
 
     # Heading
-    c.setFont("Times-Bold", 12)
+    _set_font(c, "Times-Bold", 12)
     c.drawString(heading_x, heading_y, "TO WHOM IT MAY CONCERN:")
 
     y = heading_y - heading_gap
@@ -432,15 +498,28 @@ def _build_residency_overlay(doc) -> BytesIO:
     )
     y -= height + paragraph_gap
 
-    _draw_paragraph(
-        c,
-        paragraph_issue,
-        x=left_margin,
-        top_y=y,
-        max_width=max_width,
-        max_height=100,
-        base_style=body_style,
-    )
+    if issue_single_line:
+        # Same placement as the Paragraph: first-line indent, baseline one
+        # font size below the top of the box.
+        issue_x = left_margin + body_style.firstLineIndent
+        issue_y = y - body_style.fontSize
+        _set_font(c, "Times-Roman", 12)
+        c.drawString(issue_x, issue_y, issue_prefix)
+        issue_x += _string_width(issue_prefix, "Times-Roman", 12)
+        _draw_underlined_text(c, issued_on, issue_x, issue_y, font_size=12)
+        issue_x += _string_width(issued_on, "Times-Bold", 12)
+        _set_font(c, "Times-Roman", 12)
+        c.drawString(issue_x, issue_y, issue_suffix)
+    else:
+        _draw_paragraph(
+            c,
+            paragraph_issue,
+            x=left_margin,
+            top_y=y,
+            max_width=max_width,
+            max_height=100,
+            base_style=body_style,
+        )
 
     # Normalize signature area (avoid duplicate lines from template)
     c.setFillColorRGB(1, 1, 1)
@@ -455,17 +534,17 @@ def _build_residency_overlay(doc) -> BytesIO:
     c.setFillColorRGB(0, 0, 0)
     c.setLineWidth(1.0)
     c.line(signature_line_x, signature_line_y, signature_line_x + signature_line_width, signature_line_y)
-    c.setFont("Times-Roman", 12)
+    _set_font(c, "Times-Roman", 12)
     c.drawCentredString(signature_line_x + (signature_line_width / 2), signature_line_y - 12, "Applicant Signature")
 
     # Photo / thumb labels
-    c.setFont("Times-Roman", 12)
+    _set_font(c, "Times-Roman", 12)
     photo_label_y = photo_box_y - 18
     c.drawCentredString(photo_box_x + (photo_box_w / 2), photo_label_y, "APPLICANT PHOTO")
     c.drawCentredString(thumb_box_x + (photo_box_w / 2), photo_label_y, "APPLICANT THUMBMARK")
 
     # Footer (labels + values)
-    c.setFont("Times-Roman", 12)
+    _set_font(c, "Times-Roman", 12)
     issued_at_y = footer_start_y
     issued_on_y = footer_start_y - 16
     valid_until_y = footer_start_y - 32
@@ -476,7 +555,7 @@ def _build_residency_overlay(doc) -> BytesIO:
     _draw_underlined_text(c, valid_until, footer_x + 70, valid_until_y, font_size=12)
 
     # Prepared by / Reference
-    c.setFont("Times-Roman", 12)
+    _set_font(c, "Times-Roman", 12)
     c.drawString(prep_x, prep_y, f"Prepared by: {prepared_by}")
     c.drawString(prep_x, prep_y - 16, f"Reference No: {reference_no}")
 
@@ -494,8 +573,8 @@ def _build_residency_overlay(doc) -> BytesIO:
     )
 
     c.save()
-    buffer.seek(0)
-    return buffer
+    # Hand the caller its own copy so the pooled buffer stays owned by us.
+    return BytesIO(buffer.getvalue())
 
 
 def _generate_residency_pdf(doc, output_path: str) -> None:
@@ -527,7 +606,7 @@ def _draw_kv(c: canvas.Canvas, x: float, y: float, key: str, value: str, *, valu
     val_font = "Helvetica"
     font_size = 10
 
-    c.setFont(key_font, font_size)
+    _set_font(c, key_font, font_size)
     c.drawString(x, y, f"{key}:")
 
     value_x = x + 1.6 * inch
@@ -535,7 +614,7 @@ def _draw_kv(c: canvas.Canvas, x: float, y: float, key: str, value: str, *, valu
         # 7.6in is the right margin used elsewhere in this file
         value_max_width = (7.6 * inch) - value_x
 
-    c.setFont(val_font, font_size)
+    _set_font(c, val_font, font_size)
     lines = simpleSplit(str(value or "-"), val_font, font_size, value_max_width)
     if not lines:
         lines = ["-"]
@@ -595,31 +674,43 @@ def _draw_wrapped_text_paged(
         t.setLeading(leading)
         return t
 
+    def line_budget(start_y: float) -> int:
+        # Leading is constant, so the number of lines that fit above the
+        # bottom margin is known up front; no need to probe getY() per line.
+        return max(1, math.ceil((start_y - bottom_y) / leading))
+
     y = top_y
     text = new_text(y)
+    max_lines = line_budget(y)
+    lines_drawn = 0
 
     for raw_line in str(content or "").split("\n"):
         # Keep blank lines as spacing.
         if raw_line.strip() == "":
-            if text.getY() <= bottom_y:
-                c.drawText(text)
-                c.showPage()
-                y = redraw_page_top() or top_y
-                text = new_text(y)
-            text.textLine("")
-            continue
+            wrapped = [""]
+        elif _string_width(raw_line, font_name, font_size) <= max_width:
+            wrapped = [raw_line]
+        else:
+            wrapped = simpleSplit(raw_line, font_name, font_size, max_width) or [raw_line]
 
-        wrapped = simpleSplit(raw_line, font_name, font_size, max_width) or [raw_line]
         for ln in wrapped:
-            if text.getY() <= bottom_y:
+            if lines_drawn >= max_lines:
                 c.drawText(text)
                 c.showPage()
+                c._cur_font = None
                 y = redraw_page_top() or top_y
                 text = new_text(y)
+                max_lines = line_budget(y)
+                lines_drawn = 0
             text.textLine(ln)
+            lines_drawn += 1
 
     c.drawText(text)
+    # The text object set its own font, so the tracked canvas font is stale.
+    c._cur_font = None
     return text.getY()
+
+
 def _template_barangay_id(c: canvas.Canvas, doc) -> None:
     resident = doc.resident
     _draw_header(c, "BARANGAY IDENTIFICATION CARD")
@@ -628,7 +719,7 @@ def _template_barangay_id(c: canvas.Canvas, doc) -> None:
     _draw_resident_photo(c, resident, x=6.2 * inch, y=8.0 * inch, w=1.3 * inch, h=1.3 * inch, crop_to_fill=True)
 
     y = 9.25 * inch
-    c.setFont("Helvetica", 11)
+    _set_font(c, "Helvetica", 11)
     c.drawString(0.9 * inch, y, "This certifies that the person below is a registered resident of the barangay.")
 
     y -= 0.45 * inch
@@ -647,7 +738,7 @@ def _template_barangay_id(c: canvas.Canvas, doc) -> None:
     y = _draw_kv(c, 0.9 * inch, y, "Gender", resident.gender or "-")
 
     y -= 0.2 * inch
-    c.setFont("Helvetica", 10)
+    _set_font(c, "Helvetica", 10)
     c.drawString(0.9 * inch, y, f"Issued on: {doc.issue_date.strftime('%B %d, %Y')}")
 
 
@@ -658,7 +749,7 @@ def _template_clearance(c: canvas.Canvas, doc, title: str, body: str) -> None:
         _draw_header(c, title)
         _draw_resident_photo(c, resident, x=6.2 * inch, y=8.0 * inch, w=1.3 * inch, h=1.3 * inch, crop_to_fill=True)
         y0 = 9.2 * inch
-        c.setFont("Helvetica", 11)
+        _set_font(c, "Helvetica", 11)
         c.drawString(0.9 * inch, y0, "TO WHOM IT MAY CONCERN:")
         return y0 - 0.5 * inch
 
@@ -687,7 +778,7 @@ def _template_clearance(c: canvas.Canvas, doc, title: str, body: str) -> None:
         redraw_page_top=page_top,
     )
 
-    c.setFont("Helvetica", 10)
+    _set_font(c, "Helvetica", 10)
     c.drawString(0.9 * inch, 2.2 * inch, f"Issued on: {doc.issue_date.strftime('%B %d, %Y')}")
     _draw_signature_block(c, y=1.6 * inch)
 
@@ -727,7 +818,7 @@ def _template_generic(c: canvas.Canvas, doc) -> None:
         _draw_resident_photo(c, resident, x=6.2 * inch, y=8.0 * inch, w=1.3 * inch, h=1.3 * inch, crop_to_fill=True)
 
         y0 = 9.25 * inch
-        c.setFont("Helvetica", 11)
+        _set_font(c, "Helvetica", 11)
         c.drawString(0.9 * inch, y0, "Document Details")
 
         y0 -= 0.45 * inch
@@ -770,12 +861,12 @@ def generate_document_pdf(doc) -> str:
         "UPLOAD_FOLDER",
         os.path.join(current_app.root_path, "static", "uploads"),
     )
-    root_upload_dir = os.path.join(uploads_root, "documents", folder)
+    root_upload_dir = f"{uploads_root}{_SEP}documents{_SEP}{folder}"
     os.makedirs(root_upload_dir, exist_ok=True)
 
     ts = utcnow().strftime("%Y%m%d_%H%M%S")
     filename = f"{folder}_resident_{doc.resident_id}_{ts}.pdf"
-    abs_path = os.path.join(root_upload_dir, filename)
+    abs_path = f"{root_upload_dir}{_SEP}{filename}"
 
     template_key = ""
     if doc.document_type and doc.document_type.template_path:
@@ -818,3 +909,111 @@ def generate_document_pdf(doc) -> str:
     # Path relative to <app_root>/static
     rel_path = os.path.join("uploads", "documents", folder, filename)
     return rel_path
+
+
+
+# ---------------------------------------------------------------------------
+# Bulk generation
+# ---------------------------------------------------------------------------
+
+_bulk_app = None
+
+
+def _bulk_worker_init(config: dict) -> None:
+    """Bind the ORM to a bare app once per worker process.
+
+    ``create_app()`` is deliberately not used here: its startup seeding
+    would run (and race) in every worker.
+    """
+    global _bulk_app
+    # Same import name as create_app(), so root_path/static_folder match.
+    _bulk_app = Flask("barangay_project.app")
+    _bulk_app.config.update(config)
+    db.init_app(_bulk_app)
+
+
+def _bulk_generate_one(document_id: int) -> tuple[int, str | None]:
+    with _bulk_app.app_context():
+        try:
+            doc = db.session.get(Document, document_id)
+            if doc is None:
+                return document_id, None
+            return document_id, generate_document_pdf(doc)
+        except Exception:
+            current_app.logger.exception("PDF generation failed for document #%s", document_id)
+            return document_id, None
+        finally:
+            db.session.remove()
+
+
+def generate_documents_bulk(document_ids, *, max_workers: int | None = None) -> dict[int, str | None]:
+    """Generate PDFs for many documents in parallel worker processes.
+
+    Rendering is CPU-bound and independent per document, so only primary
+    keys are sent to the workers; each one loads its Document from the
+    database. Must be called inside an app context, and the database must
+    be reachable from other processes (not in-memory SQLite).
+
+    Returns ``{document_id: relative path or None}``. Storing the paths on
+    ``Document.file_path`` is left to the caller.
+    """
+    ids = list(dict.fromkeys(int(i) for i in document_ids))
+    if not ids:
+        return {}
+
+    config = {key: value for key, value in current_app.config.items() if key.isupper()}
+    workers = min(max_workers or os.cpu_count() or 1, len(ids))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_bulk_worker_init, initargs=(config,)) as executor:
+        return dict(executor.map(_bulk_generate_one, ids))
+
+
+# ---------------------------------------------------------------------------
+# Background rendering
+# ---------------------------------------------------------------------------
+
+_render_executor: ThreadPoolExecutor | None = None
+_render_lock = threading.Lock()
+_pending_renders: set[int] = set()
+
+
+def _render_and_store(app: Flask, document_id: int) -> None:
+    with app.app_context():
+        try:
+            doc = db.session.get(Document, document_id)
+            if doc is not None and doc.status == "issued":
+                doc.file_path = generate_document_pdf(doc)
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Background PDF generation failed for document #%s", document_id)
+        finally:
+            db.session.remove()
+            with _render_lock:
+                _pending_renders.discard(document_id)
+
+
+def queue_document_pdf(document_id: int) -> None:
+    """Render and store a document's PDF on a background thread.
+
+    The document must already be committed as issued. The worker loads it
+    in its own session, saves ``file_path`` when done and logs failures;
+    the download route regenerates the file on demand if it never appears.
+    """
+    global _render_executor
+    app = current_app._get_current_object()
+    with _render_lock:
+        if document_id in _pending_renders:
+            return
+        if _render_executor is None:
+            _render_executor = ThreadPoolExecutor(
+                max_workers=int(app.config.get("PDF_RENDER_WORKERS", 2)),
+                thread_name_prefix="pdf-render",
+            )
+        _pending_renders.add(document_id)
+    _render_executor.submit(_render_and_store, app, document_id)
+
+
+def pdf_render_pending(document_id: int) -> bool:
+    """True while a queued render for the document has not finished."""
+    with _render_lock:
+        return document_id in _pending_renders
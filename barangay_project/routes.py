@@ -11,19 +11,32 @@ For admin-only features (users, document types, audit logs), see `admin.py`.
 from __future__ import annotations
 
 import os
+import base64
 import csv
 import io
-import re
-from datetime import date as dt_date, datetime
+from datetime import date as dt_date, datetime, timedelta
 
-from flask import Blueprint, current_app, flash, redirect, render_template, request, send_file, url_for
+from flask import Blueprint, Response, current_app, flash, g, jsonify, redirect, render_template, request, send_file, send_from_directory, stream_with_context, url_for
 from flask_login import login_required, current_user
 
-from sqlalchemy import func, or_
+from sqlalchemy import cast, exists, func, literal_column, null, or_, select, tuple_, union_all, update
+from sqlalchemy.orm import contains_eager, joinedload, load_only
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+# Export dependencies are imported with the module so their import cost is paid
+# at worker startup rather than by the first user to request an export.
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 from .forms import DocumentForm, ResidentForm
-from .helpers import log_action, roles_required, save_captured_image
-from .pdf_utils import generate_document_pdf
+from .helpers import document_type_options, log_action, log_actions, roles_required, save_captured_image
+from .pdf_utils import _XML_ESCAPE, generate_document_pdf, pdf_render_pending, queue_document_pdf
 from .extensions import db
 from .models import Document, DocumentType, Resident, TransactionLog, User
 from .time_utils import utcnow
@@ -31,14 +44,178 @@ from .time_utils import utcnow
 
 DOCUMENT_STATUSES = ("draft", "pending", "approved", "issued")
 DRAFT_LIKE_STATUSES = ("draft", "pending", "approved")
-BRGY_ID_PATTERN = re.compile(r"^BRGY-\\d{4}-\\d{5}$", re.IGNORECASE)
+
+# Populate Document.resident/document_type from the JOINs these queries already
+# have, instead of lazy-loading each one per row while rendering.
+_EAGER_DOC_RELATIONS = (contains_eager(Document.resident), contains_eager(Document.document_type))
+# The document list template only reads these columns; skip the rest of the
+# three wide rows it joins.
+_DOC_LIST_OPTIONS = (
+    load_only(
+        Document.resident_id,
+        Document.document_type_id,
+        Document.status,
+        Document.details,
+        Document.issue_date,
+        Document.file_path,
+        Document.created_at,
+        Document.updated_at,
+        Document.issued_at,
+        Document.is_archived,
+        Document.created_by_id,
+        Document.updated_by_id,
+        Document.issued_by_id,
+    ),
+    contains_eager(Document.resident).load_only(Resident.first_name, Resident.last_name),
+    contains_eager(Document.document_type).load_only(DocumentType.name),
+)
+
+
+_RESIDENT_SEARCH_COLUMNS = (Resident.first_name, Resident.last_name, Resident.barangay_id, Resident.address)
+_DOCUMENT_SEARCH_COLUMNS = (
+    Resident.first_name,
+    Resident.last_name,
+    Resident.barangay_id,
+    DocumentType.name,
+    Document.details,
+)
+# Names also get pg_trgm similarity matching (typo tolerant, GIN-indexed).
+_FUZZY_SEARCH_COLUMNS = (Resident.first_name, Resident.last_name)
+# Shorter needles match nearly every row and can't use the trigram indexes.
+_MIN_SEARCH_LENGTH = 2
+
+
+def _search_filter(q: str, columns: tuple):
+    """Match ``q`` anywhere in any of ``columns`` (case-insensitive).
+
+    When SEARCH_TRIGRAM is on (PostgreSQL with pg_trgm installed), resident
+    names are also matched with the trigram similarity operator.
+    """
+    like = f"%{q}%"
+    clauses = [col.ilike(like) for col in columns]
+    if current_app.config.get("SEARCH_TRIGRAM"):
+        clauses.extend(col.op("%")(q) for col in _FUZZY_SEARCH_COLUMNS)
+    return or_(*clauses)
+
+
+def _is_brgy_id(value: str) -> bool:
+    """Return True for IDs shaped like BRGY-YYYY-##### (input already upper-cased)."""
+    return (
+        len(value) == 15
+        and value.isascii()
+        and value.startswith("BRGY-")
+        and value[9] == "-"
+        and value[5:9].isdigit()
+        and value[10:].isdigit()
+    )
 
 
 def _build_user_map(user_ids: set[int]) -> dict[int, str]:
+    """Map user IDs to usernames, fetching only IDs not yet seen this request."""
     if not user_ids:
         return {}
-    users = User.query.filter(User.id.in_(user_ids)).all()
-    return {u.id: u.username for u in users}
+    cache = g.setdefault("user_names", {})
+    missing = set(user_ids) - cache.keys()
+    if missing:
+        cache.update(db.session.query(User.id, User.username).filter(User.id.in_(missing)).all())
+    return {uid: cache[uid] for uid in user_ids if uid in cache}
+
+
+class _SimplePage:
+    """A page of results that knows its neighbours but not the total count.
+
+    ``prev_args``/``next_args`` are the query-string changes that reach the
+    adjacent pages (a keyset cursor or an OFFSET page number), or None.
+    """
+
+    simple = True
+
+    def __init__(self, items: list, prev_args: dict | None, next_args: dict | None):
+        self.items = items
+        self.prev_args = prev_args
+        self.next_args = next_args
+        self.has_prev = prev_args is not None
+        self.has_next = next_args is not None
+
+
+def _encode_doc_cursor(doc: Document) -> str:
+    raw = f"{doc.issue_date.isoformat()}|{doc.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_doc_cursor(value: str | None) -> tuple[datetime, int] | None:
+    """Return the (issue_date, id) in a cursor, or None if missing/malformed."""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        issued, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(issued), int(doc_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _keyset_paginate_documents(query, per_page: int, descending: bool) -> _SimplePage:
+    """Order ``query`` by (issue_date, id) and seek to the ``after``/``before`` cursor."""
+    key = tuple_(Document.issue_date, Document.id)
+    forward = (Document.issue_date.desc(), Document.id.desc()) if descending else (Document.issue_date.asc(), Document.id.asc())
+    backward = (Document.issue_date.asc(), Document.id.asc()) if descending else (Document.issue_date.desc(), Document.id.desc())
+
+    after = _decode_doc_cursor(request.args.get("after"))
+    before = None if after else _decode_doc_cursor(request.args.get("before"))
+    if before:
+        bound = tuple_(*before)
+        query = query.filter(key > bound if descending else key < bound).order_by(*backward)
+    else:
+        if after:
+            bound = tuple_(*after)
+            query = query.filter(key < bound if descending else key > bound)
+        query = query.order_by(*forward)
+
+    # One extra row tells us whether another page exists, without a COUNT.
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after is not None, more
+    if not rows:
+        return _SimplePage(rows, None, None)
+    return _SimplePage(
+        rows,
+        {"before": _encode_doc_cursor(rows[0])} if has_prev else None,
+        {"after": _encode_doc_cursor(rows[-1])} if has_next else None,
+    )
+
+
+def _offset_paginate(query, page: int, per_page: int) -> _SimplePage:
+    """OFFSET paging without the COUNT(*) that ``db.paginate`` runs per request."""
+    page = max(page, 1)
+    rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    return _SimplePage(
+        rows[:per_page],
+        {"page": page - 1} if page > 1 else None,
+        {"page": page + 1} if more else None,
+    )
+
+
+def _selected_resident_choices(resident_id: int | None) -> list[tuple[int, str]]:
+    """Select choices holding only the chosen active resident.
+
+    The document form no longer lists every resident; other options are
+    fetched on demand from `resident_lookup` as the user types.
+    """
+    if not resident_id:
+        return []
+    row = (
+        db.session.query(Resident.id, Resident.last_name, Resident.first_name)
+        .filter(Resident.id == resident_id, Resident.is_archived.is_(False))
+        .first()
+    )
+    return [(row.id, f"{row.last_name}, {row.first_name}")] if row else []
 
 
 def _parse_date(value: str | None) -> dt_date | None:
@@ -58,45 +235,69 @@ main_bp = Blueprint("main", __name__)
 @login_required
 def index():
     """Dashboard with quick stats + charts."""
-    resident_count = Resident.query.filter(Resident.is_archived.is_(False)).count()
-    document_count = Document.query.filter(
-        Document.is_archived.is_(False),
-        Document.status == "issued",
-    ).count()
-
-    # Residents by gender
-    gender_rows = (
-        db.session.query(Resident.gender, func.count(Resident.id))
-        .filter(Resident.is_archived.is_(False))
-        .group_by(Resident.gender)
-        .all()
-    )
-    gender_labels = [g or "Unspecified" for g, _ in gender_rows]
-    gender_values = [int(c) for _, c in gender_rows]
-
-    # Documents by type
-    type_rows = (
-        db.session.query(DocumentType.name, func.count(Document.id))
+    # All panel aggregates come back from one UNION ALL round trip; each row is
+    # tagged with the panel it belongs to and demultiplexed below.
+    issued = (Document.is_archived.is_(False), Document.status == "issued")
+    no_label = cast(null(), db.String)
+    no_month = cast(null(), db.DateTime)
+
+    # Documents issued per month (last 6 months). The window is applied in SQL
+    # so ix_documents_live_issued_issue_date can serve the range scan.
+    today = dt_date.today()
+    start_index = today.year * 12 + today.month - 1 - 5
+    window_start = dt_date(start_index // 12, start_index % 12 + 1, 1)
+    month = func.date_trunc(literal_column("'month'"), Document.issue_date, type_=db.DateTime)
+
+    top_types = (
+        select(DocumentType.name.label("name"), func.count(Document.id).label("n"))
         .join(Document, Document.document_type_id == DocumentType.id)
-        .filter(Document.is_archived.is_(False), Document.status == "issued")
+        .where(*issued)
         .group_by(DocumentType.name)
         .order_by(func.count(Document.id).desc())
         .limit(8)
-        .all()
+        .subquery()
     )
-    doc_type_labels = [n for n, _ in type_rows]
-    doc_type_values = [int(c) for _, c in type_rows]
-
-    # Documents issued per month (last 6 months)
-    month_rows = (
-        db.session.query(func.to_char(Document.issue_date, 'YYYY-MM'), func.count(Document.id))
-        .filter(Document.is_archived.is_(False), Document.status == "issued")
-        .group_by(func.to_char(Document.issue_date, 'YYYY-MM'))
-        .order_by(func.to_char(Document.issue_date, 'YYYY-MM'))
-        .all()
+    panels = union_all(
+        select(literal_column("'residents'"), no_label, no_month, func.count(Resident.id))
+        .where(Resident.is_archived.is_(False)),
+        select(literal_column("'documents'"), no_label, no_month, func.count(Document.id))
+        .where(*issued),
+        select(literal_column("'gender'"), Resident.gender, no_month, func.count(Resident.id))
+        .where(Resident.is_archived.is_(False))
+        .group_by(Resident.gender),
+        select(literal_column("'type'"), top_types.c.name, no_month, top_types.c.n),
+        select(literal_column("'month'"), no_label, month, func.count(Document.id))
+        .where(*issued, Document.issue_date >= window_start)
+        .group_by(month),
     )
-    month_labels = [m for m, _ in month_rows][-6:]
-    month_values = [int(c) for _, c in month_rows][-6:]
+
+    resident_count = document_count = 0
+    gender_rows, type_rows, month_rows = [], [], []
+    for kind, label, month_start, count in db.session.execute(panels):
+        count = int(count)
+        if kind == "residents":
+            resident_count = count
+        elif kind == "documents":
+            document_count = count
+        elif kind == "gender":
+            gender_rows.append((label, count))
+        elif kind == "type":
+            type_rows.append((label, count))
+        else:
+            month_rows.append((month_start, count))
+
+    # Residents by gender
+    gender_labels = [g or "Unspecified" for g, _ in gender_rows]
+    gender_values = [c for _, c in gender_rows]
+
+    # Documents by type (UNION ALL does not keep the subquery's ordering)
+    type_rows.sort(key=lambda row: row[1], reverse=True)
+    doc_type_labels = [n for n, _ in type_rows]
+    doc_type_values = [c for _, c in type_rows]
+
+    month_rows.sort(key=lambda row: row[0])
+    month_labels = [m.strftime("%Y-%m") for m, _ in month_rows]
+    month_values = [c for _, c in month_rows]
 
     # Recent activity (audit trail)
     from .models import TransactionLog
@@ -121,6 +322,37 @@ def index():
     )
 
 
+RESIDENT_LOOKUP_PAGE_SIZE = 25
+
+
+@main_bp.route("/api/residents/search")
+@login_required
+@roles_required("admin", "clerk")
+def resident_lookup():
+    """JSON resident matches for the document form's resident picker."""
+    q = (request.args.get("q") or "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    if len(q) < _MIN_SEARCH_LENGTH:
+        return jsonify({"results": [], "has_more": False})
+
+    rows = (
+        db.session.query(Resident.id, Resident.last_name, Resident.first_name, Resident.barangay_id)
+        .filter(Resident.is_archived.is_(False), _search_filter(q, _RESIDENT_SEARCH_COLUMNS))
+        .order_by(Resident.last_name.asc(), Resident.first_name.asc(), Resident.id.asc())
+        .offset((page - 1) * RESIDENT_LOOKUP_PAGE_SIZE)
+        .limit(RESIDENT_LOOKUP_PAGE_SIZE + 1)
+        .all()
+    )
+    results = [
+        {
+            "id": r.id,
+            "text": f"{r.last_name}, {r.first_name}" + (f" ({r.barangay_id})" if r.barangay_id else ""),
+        }
+        for r in rows[:RESIDENT_LOOKUP_PAGE_SIZE]
+    ]
+    return jsonify({"results": results, "has_more": len(rows) > RESIDENT_LOOKUP_PAGE_SIZE})
+
+
 @main_bp.route("/search")
 @login_required
 @roles_required("admin", "clerk")
@@ -133,7 +365,7 @@ def global_search():
     type_id = (request.args.get("type") or "").strip()
     include_archived = (request.args.get("archived") or "").strip() == "1"
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
     results = []
     pagination = None
@@ -141,23 +373,14 @@ def global_search():
     documents_results = []
     residents_count = 0
     documents_count = 0
-    document_types = DocumentType.query.order_by(DocumentType.name.asc()).all()
+    document_types = document_type_options()
 
     if q:
         if scope in {"documents", "all"}:
             query = Document.query.join(Resident).join(DocumentType)
             if not include_archived:
                 query = query.filter(Document.is_archived.is_(False))
-            like = f"%{q}%"
-            query = query.filter(
-                or_(
-                    Resident.first_name.ilike(like),
-                    Resident.last_name.ilike(like),
-                    Resident.barangay_id.ilike(like),
-                    DocumentType.name.ilike(like),
-                    Document.details.ilike(like),
-                )
-            )
+            query = query.filter(_search_filter(q, _DOCUMENT_SEARCH_COLUMNS))
             if type_id.isdigit():
                 query = query.filter(Document.document_type_id == int(type_id))
             if status in DOCUMENT_STATUSES:
@@ -166,33 +389,29 @@ def global_search():
                 else:
                     query = query.filter(Document.status == status)
             query = query.order_by(Document.issue_date.desc())
+            eager_query = query.options(*_EAGER_DOC_RELATIONS)
             if scope == "documents":
-                pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
+                pagination = db.paginate(eager_query, page=page, per_page=per_page, error_out=False)
                 results = pagination.items
             else:
-                documents_count = query.count()
-                documents_results = query.limit(per_page).all()
+                # COUNT(*) OVER() returns the total alongside the first page in one query.
+                rows = eager_query.add_columns(func.count().over().label("total")).limit(per_page).all()
+                documents_count = rows[0].total if rows else 0
+                documents_results = [row[0] for row in rows]
 
         if scope in {"residents", "all"}:
             query = Resident.query
             if not include_archived:
                 query = query.filter(Resident.is_archived.is_(False))
-            like = f"%{q}%"
-            query = query.filter(
-                or_(
-                    Resident.first_name.ilike(like),
-                    Resident.last_name.ilike(like),
-                    Resident.barangay_id.ilike(like),
-                    Resident.address.ilike(like),
-                )
-            )
+            query = query.filter(_search_filter(q, _RESIDENT_SEARCH_COLUMNS))
             query = query.order_by(Resident.last_name.asc(), Resident.first_name.asc())
             if scope == "residents":
                 pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
                 results = pagination.items
             else:
-                residents_count = query.count()
-                residents_results = query.limit(per_page).all()
+                rows = query.add_columns(func.count().over().label("total")).limit(per_page).all()
+                residents_count = rows[0].total if rows else 0
+                residents_results = [row[0] for row in rows]
 
     return render_template(
         "search.html",
@@ -230,19 +449,26 @@ def reports():
         date_to = dt_date.today()
     if not date_from:
         date_from = date_to.replace(day=1)
+    # issue_date is a timestamp: stop before the day after date_to, not at its midnight.
+    date_end = date_to + timedelta(days=1)
 
     query = Document.query.join(DocumentType).join(Resident)
     query = query.filter(
         Document.issue_date >= date_from,
-        Document.issue_date <= date_to,
+        Document.issue_date < date_end,
         Document.is_archived.is_(False),
         Document.status == "issued",
     )
 
     total_docs = query.count()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
-    pagination = db.paginate(query.order_by(Document.issue_date.desc()), page=page, per_page=per_page, error_out=False)
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
+    pagination = db.paginate(
+        query.options(*_EAGER_DOC_RELATIONS).order_by(Document.issue_date.desc()),
+        page=page,
+        per_page=per_page,
+        error_out=False,
+    )
     docs = pagination.items
 
     by_type_rows = (
@@ -250,7 +476,7 @@ def reports():
         .join(Document)
         .filter(
             Document.issue_date >= date_from,
-            Document.issue_date <= date_to,
+            Document.issue_date < date_end,
             Document.is_archived.is_(False),
             Document.status == "issued",
         )
@@ -276,6 +502,36 @@ def reports():
     )
 
 
+REPORT_HEADERS = ["Issue Date", "Type", "Resident", "Details"]
+
+# PDF report styles and the Paragraph markup escape (same &, <, > mapping as
+# xml.sax.saxutils.escape, applied in a single translate pass).
+_REPORT_STYLES = getSampleStyleSheet()
+_REPORT_BODY_STYLE = ParagraphStyle(
+    "ReportBody",
+    parent=_REPORT_STYLES["Normal"],
+    fontName="Helvetica",
+    fontSize=8,
+    leading=10,
+    alignment=TA_LEFT,
+)
+_REPORT_HEADER_STYLE = ParagraphStyle(
+    "ReportHeader",
+    parent=_REPORT_BODY_STYLE,
+    fontName="Helvetica-Bold",
+)
+
+
+def _report_row(d: Document) -> list[str]:
+    """One export row for an issued document, in REPORT_HEADERS order."""
+    return [
+        d.issue_date.isoformat() if d.issue_date else "",
+        d.document_type.name if d.document_type else "",
+        f"{d.resident.last_name}, {d.resident.first_name}" if d.resident else "",
+        d.details or "",
+    ]
+
+
 @main_bp.route("/reports/export/<string:fmt>")
 @login_required
 @roles_required("admin", "clerk")
@@ -288,96 +544,93 @@ def export_reports(fmt: str):
         date_to = dt_date.today()
     if not date_from:
         date_from = date_to.replace(day=1)
+    # issue_date is a timestamp: stop before the day after date_to, not at its midnight.
+    date_end = date_to + timedelta(days=1)
 
     query = Document.query.join(DocumentType).join(Resident)
     query = query.filter(
         Document.issue_date >= date_from,
-        Document.issue_date <= date_to,
+        Document.issue_date < date_end,
         Document.is_archived.is_(False),
         Document.status == "issued",
     )
-    docs = query.order_by(Document.issue_date.asc()).all()
-
-    rows = []
-    for d in docs:
-        rows.append(
-            {
-                "Issue Date": d.issue_date.isoformat() if d.issue_date else "",
-                "Type": d.document_type.name if d.document_type else "",
-                "Resident": f"{d.resident.last_name}, {d.resident.first_name}" if d.resident else "",
-                "Details": d.details or "",
-            }
-        )
-
+    query = query.options(*_EAGER_DOC_RELATIONS).order_by(Document.issue_date.asc())
     filename_base = f"report_{date_from.isoformat()}_{date_to.isoformat()}"
 
     if fmt == "csv":
-        output = io.StringIO()
-        fieldnames = list(rows[0].keys()) if rows else ["Issue Date", "Type", "Resident", "Details"]
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-        data = io.BytesIO(output.getvalue().encode("utf-8"))
-        log_action("Exported reports (CSV)", entity_type="report", meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": len(rows)})
-        return send_file(data, mimetype="text/csv", as_attachment=True, download_name=f"{filename_base}.csv")
+        # Stream rows as they are read so memory stays flat for large ranges.
+        def generate():
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+
+            def flush() -> str:
+                line = buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+                return line
+
+            count = 0
+            completed = False
+            # Audit in `finally` so an aborted download (the server closes the
+            # generator) or a failed query is still recorded.
+            try:
+                writer.writerow(REPORT_HEADERS)
+                yield flush()
+                for d in query.yield_per(500):
+                    writer.writerow(_report_row(d))
+                    count += 1
+                    yield flush()
+                completed = True
+            finally:
+                if not completed:
+                    db.session.rollback()
+                log_action(
+                    "Exported reports (CSV)",
+                    entity_type="report",
+                    meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": count, "completed": completed},
+                )
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename_base}.csv"},
+        )
 
     if fmt == "xlsx":
-        from openpyxl import Workbook
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Documents"
-        headers = list(rows[0].keys()) if rows else ["Issue Date", "Type", "Resident", "Details"]
-        ws.append(headers)
-        for r in rows:
-            ws.append([r.get(h, "") for h in headers])
+        # Write-only mode serializes each row as it is appended instead of
+        # keeping a Cell object per value for the whole sheet.
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Documents")
+        ws.append(REPORT_HEADERS)
+        count = 0
+        for d in query.yield_per(500):
+            ws.append(_report_row(d))
+            count += 1
         bio = io.BytesIO()
         wb.save(bio)
         bio.seek(0)
-        log_action("Exported reports (XLSX)", entity_type="report", meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": len(rows)})
+        log_action("Exported reports (XLSX)", entity_type="report", meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": count})
         return send_file(bio, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", as_attachment=True, download_name=f"{filename_base}.xlsx")
 
     if fmt == "pdf":
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_LEFT
-        from xml.sax.saxutils import escape as xml_escape
-
         bio = io.BytesIO()
         doc = SimpleDocTemplate(bio, pagesize=letter, leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        base_style = ParagraphStyle(
-            "ReportBody",
-            parent=styles["Normal"],
-            fontName="Helvetica",
-            fontSize=8,
-            leading=10,
-            alignment=TA_LEFT,
-        )
-        header_style = ParagraphStyle(
-            "ReportHeader",
-            parent=base_style,
-            fontName="Helvetica-Bold",
-        )
+        # The table is capped at 300 rows, so only fetch that many.
+        docs = query.limit(300).all()
         story = []
-        story.append(Paragraph(f"Issued Documents Report ({date_from.isoformat()} to {date_to.isoformat()})", styles["Title"]))
+        story.append(Paragraph(f"Issued Documents Report ({date_from.isoformat()} to {date_to.isoformat()})", _REPORT_STYLES["Title"]))
         story.append(Spacer(1, 0.2*inch))
 
-        headers = ["Date", "Type", "Resident", "Details"]
-        data = [[Paragraph(h, header_style) for h in headers]]
-        for d in docs[:300]:
+        data = [[Paragraph(h, _REPORT_HEADER_STYLE) for h in ("Date", "Type", "Resident", "Details")]]
+        for d in docs:
             details = (d.details or "").strip()
             if len(details) > 300:
                 details = f"{details[:297]}..."
             data.append([
-                Paragraph(xml_escape(d.issue_date.strftime("%Y-%m-%d") if d.issue_date else ""), base_style),
-                Paragraph(xml_escape(d.document_type.name if d.document_type else ""), base_style),
-                Paragraph(xml_escape(f"{d.resident.last_name}, {d.resident.first_name}" if d.resident else ""), base_style),
-                Paragraph(xml_escape(details), base_style),
+                Paragraph(d.issue_date.strftime("%Y-%m-%d") if d.issue_date else "", _REPORT_BODY_STYLE),
+                Paragraph((d.document_type.name if d.document_type else "").translate(_XML_ESCAPE), _REPORT_BODY_STYLE),
+                Paragraph((f"{d.resident.last_name}, {d.resident.first_name}" if d.resident else "").translate(_XML_ESCAPE), _REPORT_BODY_STYLE),
+                Paragraph(details.translate(_XML_ESCAPE), _REPORT_BODY_STYLE),
             ])
 
         table = Table(data, repeatRows=1, colWidths=[1.0*inch, 1.4*inch, 2.2*inch, 2.4*inch])
@@ -395,7 +648,7 @@ def export_reports(fmt: str):
         story.append(table)
         doc.build(story)
         bio.seek(0)
-        log_action("Exported reports (PDF)", entity_type="report", meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": len(rows)})
+        log_action("Exported reports (PDF)", entity_type="report", meta={"from": date_from.isoformat(), "to": date_to.isoformat(), "rows": len(docs)})
         return send_file(bio, mimetype="application/pdf", as_attachment=True, download_name=f"{filename_base}.pdf")
 
     flash("Unsupported export format.", "danger")
@@ -420,20 +673,12 @@ def list_residents():
     gender = (request.args.get("gender") or "").strip()
     sort = (request.args.get("sort") or "name_asc").strip()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
     query = Resident.query
     query = query.filter(Resident.is_archived.is_(False))
     if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Resident.first_name.ilike(like),
-                Resident.last_name.ilike(like),
-                Resident.barangay_id.ilike(like),
-                Resident.address.ilike(like),
-            )
-        )
+        query = query.filter(_search_filter(q, _RESIDENT_SEARCH_COLUMNS))
     if gender:
         query = query.filter(Resident.gender == gender)
 
@@ -480,19 +725,11 @@ def list_archived_residents():
     gender = (request.args.get("gender") or "").strip()
     sort = (request.args.get("sort") or "name_asc").strip()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
     query = Resident.query.filter(Resident.is_archived.is_(True))
     if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Resident.first_name.ilike(like),
-                Resident.last_name.ilike(like),
-                Resident.barangay_id.ilike(like),
-                Resident.address.ilike(like),
-            )
-        )
+        query = query.filter(_search_filter(q, _RESIDENT_SEARCH_COLUMNS))
     if gender:
         query = query.filter(Resident.gender == gender)
 
@@ -543,11 +780,16 @@ def add_resident():
 
         first = (form.first_name.data or "").strip()
         last = (form.last_name.data or "").strip()
-        existing = Resident.query.filter(
-            func.lower(Resident.first_name) == first.lower(),
-            func.lower(Resident.last_name) == last.lower(),
-            Resident.birth_date == form.birth_date.data,
-        ).first()
+        # Only the archived flag is needed, so skip hydrating a Resident.
+        existing = (
+            db.session.query(Resident.is_archived)
+            .filter(
+                func.lower(Resident.first_name) == first.lower(),
+                func.lower(Resident.last_name) == last.lower(),
+                Resident.birth_date == form.birth_date.data,
+            )
+            .first()
+        )
         if existing:
             msg = "Resident already exists."
             if existing.is_archived:
@@ -558,11 +800,11 @@ def add_resident():
         barangay_id = form.barangay_id.data.strip() if form.barangay_id.data else None
         if barangay_id:
             normalized = barangay_id.strip().upper()
-            if not BRGY_ID_PATTERN.match(normalized):
+            if not _is_brgy_id(normalized):
                 form.barangay_id.errors.append("Barangay ID must follow format BRGY-YYYY-##### (e.g., BRGY-2026-00001).")
                 return render_template("resident_form.html", form=form, title="Add Resident")
-            existing = Resident.query.filter(func.upper(Resident.barangay_id) == normalized).first()
-            if existing:
+            taken = db.session.scalar(select(exists().where(func.upper(Resident.barangay_id) == normalized)))
+            if taken:
                 form.barangay_id.errors.append("Barangay ID is already in use.")
                 return render_template("resident_form.html", form=form, title="Add Resident")
             barangay_id = normalized
@@ -584,12 +826,8 @@ def add_resident():
             photo_rel_path = save_captured_image(form.photo_data.data, "residents")
         if photo_rel_path:
             resident.photo_path = photo_rel_path
+        # A missing barangay ID is generated by the database on INSERT.
         db.session.add(resident)
-        # Ensure we have an ID for consistent auto-generated Barangay IDs
-        db.session.flush()
-        if not resident.barangay_id:
-            resident.barangay_id = f"BRGY-{dt_date.today().year}-{resident.id:05d}"
-
         db.session.commit()
         log_action(
             f"Created resident #{resident.id} ({resident.last_name}, {resident.first_name})",
@@ -621,12 +859,16 @@ def edit_resident(resident_id: int):
 
         first = (form.first_name.data or "").strip()
         last = (form.last_name.data or "").strip()
-        existing = Resident.query.filter(
-            func.lower(Resident.first_name) == first.lower(),
-            func.lower(Resident.last_name) == last.lower(),
-            Resident.birth_date == form.birth_date.data,
-            Resident.id != resident.id,
-        ).first()
+        existing = (
+            db.session.query(Resident.is_archived)
+            .filter(
+                func.lower(Resident.first_name) == first.lower(),
+                func.lower(Resident.last_name) == last.lower(),
+                Resident.birth_date == form.birth_date.data,
+                Resident.id != resident.id,
+            )
+            .first()
+        )
         if existing:
             msg = "Resident already exists."
             if existing.is_archived:
@@ -638,14 +880,18 @@ def edit_resident(resident_id: int):
         if barangay_id:
             normalized = barangay_id.strip().upper()
             current = (resident.barangay_id or "").strip().upper()
-            if normalized != current and not BRGY_ID_PATTERN.match(normalized):
+            if normalized != current and not _is_brgy_id(normalized):
                 form.barangay_id.errors.append("Barangay ID must follow format BRGY-YYYY-##### (e.g., BRGY-2026-00001).")
                 return render_template("resident_form.html", form=form, title="Edit Resident")
-            existing = Resident.query.filter(
-                func.upper(Resident.barangay_id) == normalized,
-                Resident.id != resident.id,
-            ).first()
-            if existing:
+            taken = db.session.scalar(
+                select(
+                    exists().where(
+                        func.upper(Resident.barangay_id) == normalized,
+                        Resident.id != resident.id,
+                    )
+                )
+            )
+            if taken:
                 form.barangay_id.errors.append("Barangay ID is already in use.")
                 return render_template("resident_form.html", form=form, title="Edit Resident")
             barangay_id = normalized
@@ -688,7 +934,7 @@ def resident_profile(resident_id: int):
     doc_status = (request.args.get("status") or "").strip()
     show_archived = (request.args.get("archived") or "").strip() == "1"
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
     docs_query = Document.query.filter(Document.resident_id == resident.id)
     if not show_archived:
@@ -698,23 +944,21 @@ def resident_profile(resident_id: int):
             docs_query = docs_query.filter(Document.status.in_(DRAFT_LIKE_STATUSES))
         else:
             docs_query = docs_query.filter(Document.status == doc_status)
-    docs_query = docs_query.order_by(Document.issue_date.desc())
+    docs_query = docs_query.options(joinedload(Document.document_type)).order_by(Document.issue_date.desc())
 
     pagination = db.paginate(docs_query, page=page, per_page=per_page, error_out=False)
     documents = pagination.items
-    doc_types = DocumentType.query.order_by(DocumentType.name.asc()).all()
+    doc_types = document_type_options()
+    # One lookup covers the document audit columns and the resident's own.
     user_ids = {
         uid
         for doc in documents
         for uid in (doc.updated_by_id, doc.issued_by_id, doc.created_by_id)
         if uid
     }
+    user_ids.update(uid for uid in (resident.updated_by_id, resident.created_by_id) if uid)
     user_map = _build_user_map(user_ids)
-    updated_by = None
-    if resident.updated_by_id:
-        updated_by = user_map.get(resident.updated_by_id)
-    if not updated_by and resident.created_by_id:
-        updated_by = _build_user_map({resident.created_by_id}).get(resident.created_by_id)
+    updated_by = user_map.get(resident.updated_by_id) or user_map.get(resident.created_by_id)
 
     return render_template(
         "resident_detail.html",
@@ -735,21 +979,24 @@ def resident_profile(resident_id: int):
 def delete_resident(resident_id: int):
     resident = db.get_or_404(Resident, resident_id)
     display = f"{resident.last_name}, {resident.first_name}"
+    # One timestamp for the resident and its documents so the cascade lines up.
+    now = utcnow()
+    user_id = current_user.id
     resident.is_archived = True
-    resident.archived_at = utcnow()
-    resident.archived_by_id = current_user.id
-    resident.updated_at = utcnow()
-    resident.updated_by_id = current_user.id
+    resident.archived_at = now
+    resident.archived_by_id = user_id
+    resident.updated_at = now
+    resident.updated_by_id = user_id
     Document.query.filter(
         Document.resident_id == resident.id,
         Document.is_archived.is_(False),
     ).update(
         {
             "is_archived": True,
-            "archived_at": utcnow(),
-            "archived_by_id": current_user.id,
-            "updated_at": utcnow(),
-            "updated_by_id": current_user.id,
+            "archived_at": now,
+            "archived_by_id": user_id,
+            "updated_at": now,
+            "updated_by_id": user_id,
         },
         synchronize_session=False,
     )
@@ -767,49 +1014,51 @@ def delete_resident(resident_id: int):
 @login_required
 @roles_required("admin", "clerk")
 def bulk_archive_residents():
-    ids = [int(x) for x in request.form.getlist("resident_ids") if x.isdigit()]
+    ids = {int(x) for x in request.form.getlist("resident_ids") if x.isdigit()}
     if not ids:
         flash("Select at least one resident to archive.", "warning")
         return redirect(url_for("main.list_residents"))
 
-    residents = Resident.query.filter(Resident.id.in_(ids), Resident.is_archived.is_(False)).all()
+    now = utcnow()
+    user_id = current_user.id
+    archive_values = {
+        "is_archived": True,
+        "archived_at": now,
+        "archived_by_id": user_id,
+        "updated_at": now,
+        "updated_by_id": user_id,
+    }
+    # RETURNING hands back exactly the rows archived here, which is all the
+    # audit log needs, so there is no separate SELECT beforehand.
+    residents = db.session.execute(
+        update(Resident)
+        .where(Resident.id.in_(ids), Resident.is_archived.is_(False))
+        .values(archive_values)
+        .returning(Resident.id, Resident.last_name, Resident.first_name),
+        execution_options={"synchronize_session": False},
+    ).all()
     if not residents:
+        db.session.rollback()
         flash("No active residents selected.", "warning")
         return redirect(url_for("main.list_residents"))
 
-    now = utcnow()
-    resident_ids = []
-    for resident in residents:
-        resident_ids.append(resident.id)
-        resident.is_archived = True
-        resident.archived_at = now
-        resident.archived_by_id = current_user.id
-        resident.updated_at = now
-        resident.updated_by_id = current_user.id
-
     Document.query.filter(
-        Document.resident_id.in_(resident_ids),
+        Document.resident_id.in_([resident.id for resident in residents]),
         Document.is_archived.is_(False),
-    ).update(
-        {
-            "is_archived": True,
-            "archived_at": now,
-            "archived_by_id": current_user.id,
-            "updated_at": now,
-            "updated_by_id": current_user.id,
-        },
-        synchronize_session=False,
-    )
+    ).update(archive_values, synchronize_session=False)
 
     db.session.commit()
 
-    for resident in residents:
-        display = f"{resident.last_name}, {resident.first_name}"
-        log_action(
-            f"Archived resident #{resident.id} ({display}) (bulk)",
-            entity_type="resident",
-            entity_id=resident.id,
-        )
+    log_actions(
+        [
+            {
+                "action": f"Archived resident #{resident.id} ({resident.last_name}, {resident.first_name}) (bulk)",
+                "entity_type": "resident",
+                "entity_id": resident.id,
+            }
+            for resident in residents
+        ]
+    )
 
     flash(f"Archived {len(residents)} resident(s).", "info")
     return redirect(url_for("main.list_residents"))
@@ -844,94 +1093,18 @@ def restore_resident(resident_id: int):
 @login_required
 @roles_required("admin", "clerk")
 def list_documents():
-    q = (request.args.get("q") or "").strip()
-    type_id = (request.args.get("type") or "").strip()
-    date_from = (request.args.get("from") or "").strip()
-    date_to = (request.args.get("to") or "").strip()
-    sort = (request.args.get("sort") or "issue_desc").strip()
-    status = (request.args.get("status") or "").strip()
-    page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
-
-    query = Document.query.join(Resident).join(DocumentType)
-    query = query.filter(Document.is_archived.is_(False))
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Resident.first_name.ilike(like),
-                Resident.last_name.ilike(like),
-                Resident.barangay_id.ilike(like),
-                DocumentType.name.ilike(like),
-                Document.details.ilike(like),
-            )
-        )
-
-    if type_id.isdigit():
-        query = query.filter(Document.document_type_id == int(type_id))
-
-    if status in DOCUMENT_STATUSES:
-        if status == "draft":
-            query = query.filter(Document.status.in_(DRAFT_LIKE_STATUSES))
-        else:
-            query = query.filter(Document.status == status)
-
-    # Optional date range (YYYY-MM-DD)
-    try:
-        if date_from:
-            df = datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(Document.issue_date >= df)
-        if date_to:
-            dt_ = datetime.strptime(date_to, "%Y-%m-%d")
-            query = query.filter(Document.issue_date <= dt_)
-    except ValueError:
-        pass
-
-    # Sorting
-    if sort == "issue_asc":
-        query = query.order_by(Document.issue_date.asc(), Document.id.asc())
-    elif sort == "type_asc":
-        query = query.order_by(DocumentType.name.asc(), Document.issue_date.desc())
-    elif sort == "type_desc":
-        query = query.order_by(DocumentType.name.desc(), Document.issue_date.desc())
-    elif sort == "resident_asc":
-        query = query.order_by(Resident.last_name.asc(), Resident.first_name.asc(), Document.issue_date.desc())
-    elif sort == "resident_desc":
-        query = query.order_by(Resident.last_name.desc(), Resident.first_name.desc(), Document.issue_date.desc())
-    else:
-        query = query.order_by(Document.issue_date.desc(), Document.id.desc())
-
-    pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
-    documents = pagination.items
-    types = DocumentType.query.order_by(DocumentType.name.asc()).all()
-    user_ids = {
-        uid
-        for doc in documents
-        for uid in (doc.updated_by_id, doc.issued_by_id, doc.created_by_id)
-        if uid
-    }
-    user_map = _build_user_map(user_ids)
-    return render_template(
-        "documents.html",
-        documents=documents,
-        document_types=types,
-        q=q,
-        type_id=type_id,
-        date_from=date_from,
-        date_to=date_to,
-        sort=sort,
-        status=status,
-        archived_view=False,
-        pagination=pagination,
-        user_map=user_map,
-    )
+    return _render_document_list(archived=False)
 
 
 @main_bp.route("/documents/archived")
 @login_required
 @roles_required("admin", "clerk")
 def list_archived_documents():
+    return _render_document_list(archived=True)
+
+
+def _render_document_list(archived: bool):
+    """Filtered, sorted and paginated document list (active or archived)."""
     q = (request.args.get("q") or "").strip()
     type_id = (request.args.get("type") or "").strip()
     date_from = (request.args.get("from") or "").strip()
@@ -939,21 +1112,19 @@ def list_archived_documents():
     sort = (request.args.get("sort") or "issue_desc").strip()
     status = (request.args.get("status") or "").strip()
     page = request.args.get("page", 1, type=int)
-    per_page = int(current_app.config.get("DEFAULT_PAGE_SIZE", 20))
+    per_page = current_app.config["DEFAULT_PAGE_SIZE"]
 
-    query = Document.query.join(Resident).join(DocumentType).filter(Document.is_archived.is_(True))
+    query = (
+        Document.query.join(Resident)
+        .join(DocumentType)
+        .options(*_DOC_LIST_OPTIONS)
+        .filter(Document.is_archived.is_(archived))
+    )
 
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Resident.first_name.ilike(like),
-                Resident.last_name.ilike(like),
-                Resident.barangay_id.ilike(like),
-                DocumentType.name.ilike(like),
-                Document.details.ilike(like),
-            )
-        )
+    if len(q) >= _MIN_SEARCH_LENGTH:
+        query = query.filter(_search_filter(q, _DOCUMENT_SEARCH_COLUMNS))
+    elif q:
+        flash(f"Enter at least {_MIN_SEARCH_LENGTH} characters to search.", "info")
 
     if type_id.isdigit():
         query = query.filter(Document.document_type_id == int(type_id))
@@ -970,14 +1141,16 @@ def list_archived_documents():
             df = datetime.strptime(date_from, "%Y-%m-%d")
             query = query.filter(Document.issue_date >= df)
         if date_to:
-            dt_ = datetime.strptime(date_to, "%Y-%m-%d")
-            query = query.filter(Document.issue_date <= dt_)
+            # Half-open upper bound so the whole end day matches (issue_date is a timestamp).
+            dt_ = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+            query = query.filter(Document.issue_date < dt_)
     except ValueError:
         pass
 
-    # Sorting
+    # Sorting. The issue date orders page by keyset; the others use OFFSET.
+    pagination = None
     if sort == "issue_asc":
-        query = query.order_by(Document.issue_date.asc(), Document.id.asc())
+        pagination = _keyset_paginate_documents(query, per_page, descending=False)
     elif sort == "type_asc":
         query = query.order_by(DocumentType.name.asc(), Document.issue_date.desc())
     elif sort == "type_desc":
@@ -987,11 +1160,12 @@ def list_archived_documents():
     elif sort == "resident_desc":
         query = query.order_by(Resident.last_name.desc(), Resident.first_name.desc(), Document.issue_date.desc())
     else:
-        query = query.order_by(Document.issue_date.desc(), Document.id.desc())
+        pagination = _keyset_paginate_documents(query, per_page, descending=True)
 
-    pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
+    if pagination is None:
+        pagination = _offset_paginate(query, page, per_page)
     documents = pagination.items
-    types = DocumentType.query.order_by(DocumentType.name.asc()).all()
+    types = document_type_options()
     user_ids = {
         uid
         for doc in documents
@@ -1009,12 +1183,28 @@ def list_archived_documents():
         date_to=date_to,
         sort=sort,
         status=status,
-        archived_view=True,
+        archived_view=archived,
         pagination=pagination,
         user_map=user_map,
     )
 
 
+def _document_pdf_mtime(static_root: str, rel_path: str | None) -> float | None:
+    """Return the mtime of a stored PDF, or ``None`` if it is missing.
+
+    The path is resolved with ``safe_join`` so a stored path can never point
+    outside the static directory; one ``stat`` covers both the existence
+    check and the ETag.
+    """
+    abs_path = safe_join(static_root, rel_path) if rel_path else None
+    if abs_path is None:
+        return None
+    try:
+        return os.stat(abs_path).st_mtime
+    except OSError:
+        return None
+
+
 @main_bp.route("/documents/<int:document_id>/pdf", methods=["GET"])
 @login_required
 @roles_required("admin", "clerk")
@@ -1027,6 +1217,9 @@ def download_document_pdf(document_id: int):
     if doc.status != "issued":
         flash("Only issued documents can be downloaded.", "warning")
         return redirect(url_for("main.list_documents"))
+    if not doc.file_path and pdf_render_pending(doc.id):
+        flash("The PDF is still being generated. Please try again in a moment.", "info")
+        return redirect(url_for("main.list_documents"))
     if not doc.file_path:
         # Try generating on-demand if missing
         pdf_rel_path = generate_document_pdf(doc)
@@ -1038,22 +1231,30 @@ def download_document_pdf(document_id: int):
             return redirect(url_for("main.list_documents"))
 
     # doc.file_path is stored relative to the /static directory
-    pdf_abs_path = os.path.join(current_app.root_path, "static", doc.file_path)
-    if not os.path.exists(pdf_abs_path):
+    static_root = os.path.join(current_app.root_path, "static")
+    mtime = _document_pdf_mtime(static_root, doc.file_path)
+    if mtime is None:
         # Auto-regenerate on demand (e.g., after moving ...
         try:
             doc.file_path = generate_document_pdf(doc)
             db.session.commit()
-            pdf_abs_path = os.path.join(current_app.root_path, "static", doc.file_path)
         except Exception:
             db.session.rollback()
             flash("PDF file is missing on disk and could not be regenerated.", "danger")
             return redirect(url_for("main.list_documents"))
+        mtime = _document_pdf_mtime(static_root, doc.file_path)
 
-    if not os.path.exists(pdf_abs_path):
+    if mtime is None:
         flash("PDF file is missing on disk. Please re-issue or regenerate.", "danger")
         return redirect(url_for("main.list_documents"))
 
+    # Repeat downloads of an unchanged file get a bodyless 304 (and no audit entry).
+    etag = f"{doc.id}-{int(mtime)}"
+    if request.if_none_match.contains(etag):
+        not_modified = current_app.response_class(status=304)
+        not_modified.set_etag(etag)
+        return not_modified
+
     log_action(
         "Downloaded document PDF",
         entity_type="document",
@@ -1064,7 +1265,34 @@ def download_document_pdf(document_id: int):
         },
     )
 
-    return send_file(pdf_abs_path, mimetype="application/pdf", as_attachment=True)
+    accel_prefix = current_app.config.get("X_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        # nginx serves the bytes from its internal location; the worker only sends headers.
+        response = current_app.response_class(mimetype="application/pdf")
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{doc.file_path.replace(os.sep, '/')}"
+        response.headers["Content-Disposition"] = f'attachment; filename="{os.path.basename(doc.file_path)}"'
+        response.set_etag(etag)
+        response.last_modified = mtime
+        response.cache_control.max_age = 3600
+    else:
+        # With USE_X_SENDFILE on, send_file only emits an X-Sendfile header.
+        try:
+            response = send_from_directory(
+                static_root,
+                doc.file_path,
+                mimetype="application/pdf",
+                as_attachment=True,
+                etag=etag,
+                last_modified=mtime,
+                max_age=3600,
+            )
+        except NotFound:
+            flash("PDF file is missing on disk. Please re-issue or regenerate.", "danger")
+            return redirect(url_for("main.list_documents"))
+    # Issued PDFs carry resident data: browsers may cache them, shared proxies may not.
+    response.cache_control.private = True
+    response.cache_control.public = False
+    return response
 
 
 @main_bp.route("/documents/issue", methods=["GET", "POST"])
@@ -1072,13 +1300,7 @@ def download_document_pdf(document_id: int):
 @roles_required("admin", "clerk")
 def issue_document():
     form = DocumentForm()
-    form.resident_id.choices = [
-        (r.id, f"{r.last_name}, {r.first_name}")
-        for r in Resident.query.filter(Resident.is_archived.is_(False)).order_by(Resident.last_name.asc())
-    ]
-    form.document_type_id.choices = [
-        (d.id, d.name) for d in DocumentType.query.order_by(DocumentType.name.asc())
-    ]
+    form.document_type_id.choices = [(d.id, d.name) for d in document_type_options()]
 
     if request.method == "GET":
         pref_resident_id = request.args.get("resident_id", type=int)
@@ -1087,6 +1309,7 @@ def issue_document():
             form.resident_id.data = pref_resident_id
         if pref_doc_type_id and form.document_type_id.data is None:
             form.document_type_id.data = pref_doc_type_id
+    form.resident_id.choices = _selected_resident_choices(form.resident_id.data)
 
     if form.validate_on_submit():
         resident = db.get_or_404(Resident, form.resident_id.data)
@@ -1148,13 +1371,8 @@ def edit_document(document_id: int):
     form = DocumentForm(obj=document)
 
     # Populate selects
-    form.resident_id.choices = [
-        (r.id, f"{r.last_name}, {r.first_name}")
-        for r in Resident.query.filter(Resident.is_archived.is_(False)).order_by(Resident.last_name.asc())
-    ]
-    form.document_type_id.choices = [
-        (d.id, d.name) for d in DocumentType.query.order_by(DocumentType.name.asc())
-    ]
+    form.resident_id.choices = _selected_resident_choices(form.resident_id.data or document.resident_id)
+    form.document_type_id.choices = [(d.id, d.name) for d in document_type_options()]
     form.submit.label.text = "Update"
 
     # Set defaults for GET
@@ -1240,20 +1458,29 @@ def finalize_document_issue(document_id: int):
     if document.status in {"pending", "approved"}:
         document.approved_at = None
         document.approved_by_id = None
+    now = utcnow()
     document.status = "issued"
-    document.issued_at = utcnow()
+    document.issued_at = now
     document.issued_by_id = current_user.id
-    document.updated_at = utcnow()
+    document.updated_at = now
     document.updated_by_id = current_user.id
 
     if not document.issue_date:
-        document.issue_date = utcnow()
+        document.issue_date = now
 
-    db.session.commit()
-
-    pdf_rel_path = generate_document_pdf(document)
-    if pdf_rel_path:
-        document.file_path = pdf_rel_path
+    if current_app.config.get("PDF_RENDER_ASYNC"):
+        db.session.commit()
+        queue_document_pdf(document.id)
+    else:
+        # Status change and file path are saved together in one commit. A failed
+        # render still issues the document; download regenerates the PDF on demand.
+        try:
+            pdf_rel_path = generate_document_pdf(document)
+        except Exception:
+            current_app.logger.exception("PDF generation failed for document #%s", document.id)
+            pdf_rel_path = None
+        if pdf_rel_path:
+            document.file_path = pdf_rel_path
         db.session.commit()
 
     log_action(
@@ -1317,10 +1544,11 @@ def document_history(document_id: int):
 @roles_required("admin", "clerk")
 def delete_document(document_id: int):
     document = db.get_or_404(Document, document_id)
+    now = utcnow()
     document.is_archived = True
-    document.archived_at = utcnow()
+    document.archived_at = now
     document.archived_by_id = current_user.id
-    document.updated_at = utcnow()
+    document.updated_at = now
     document.updated_by_id = current_user.id
     db.session.commit()
     log_action(
@@ -1336,33 +1564,35 @@ def delete_document(document_id: int):
 @login_required
 @roles_required("admin", "clerk")
 def bulk_archive_documents():
-    ids = [int(x) for x in request.form.getlist("document_ids") if x.isdigit()]
+    ids = {int(x) for x in request.form.getlist("document_ids") if x.isdigit()}
     if not ids:
         flash("Select at least one document to archive.", "warning")
         return redirect(url_for("main.list_documents"))
 
-    docs = Document.query.filter(Document.id.in_(ids), Document.is_archived.is_(False)).all()
-    if not docs:
+    # One UPDATE archives the batch and RETURNING gives the ids for the audit
+    # rows, so no Document objects are loaded or tracked.
+    now = utcnow()
+    user_id = current_user.id
+    archived_ids = db.session.scalars(
+        update(Document)
+        .where(Document.id.in_(ids), Document.is_archived.is_(False))
+        .values(is_archived=True, archived_at=now, archived_by_id=user_id, updated_at=now, updated_by_id=user_id)
+        .returning(Document.id),
+        execution_options={"synchronize_session": False},
+    ).all()
+    if not archived_ids:
+        db.session.rollback()
         flash("No active documents selected.", "warning")
         return redirect(url_for("main.list_documents"))
-
-    now = utcnow()
-    for doc in docs:
-        doc.is_archived = True
-        doc.archived_at = now
-        doc.archived_by_id = current_user.id
-        doc.updated_at = now
-        doc.updated_by_id = current_user.id
-
     db.session.commit()
 
-    for doc in docs:
-        log_action(
-            f"Archived document #{doc.id} (bulk)",
-            entity_type="document",
-            entity_id=doc.id,
-        )
-    flash(f"Archived {len(docs)} document(s).", "info")
+    log_actions(
+        [
+            {"action": f"Archived document #{doc_id} (bulk)", "entity_type": "document", "entity_id": doc_id}
+            for doc_id in sorted(archived_ids)
+        ]
+    )
+    flash(f"Archived {len(archived_ids)} document(s).", "info")
     return redirect(url_for("main.list_documents"))
 
 
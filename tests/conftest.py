@@ -1,7 +1,14 @@
 import os
+import time
 from datetime import date
+from functools import lru_cache
+from types import SimpleNamespace
 
 import pytest
+from flask import session
+from flask_login import login_user
+from sqlalchemy.orm import scoped_session, sessionmaker
+from werkzeug.security import generate_password_hash
 
 from barangay_project.app import create_app
 from barangay_project.config import TestingConfig
@@ -9,59 +16,148 @@ from barangay_project.extensions import db
 from barangay_project.models import DocumentType, Resident, User
 
 
-@pytest.fixture
-def app(tmp_path):
-    db_path = tmp_path / "test.sqlite"
-    upload_dir = tmp_path / "uploads"
-
-    class TestConfig(TestingConfig):
-        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
-        WTF_CSRF_ENABLED = False
-        ADMIN_MFA_REQUIRED = False
-        LOGIN_RATE_LIMIT_MAX = 3
-        LOGIN_RATE_LIMIT_WINDOW_SECONDS = 60
-        MAIL_SUPPRESS_SEND = True
-        AUTO_MIGRATE = False
-        AUTO_CREATE_DB = True
-        UPLOAD_FOLDER = str(upload_dir)
-        SECURITY_HEADERS_ENABLED = False
-        ERROR_REPORT_EMAIL = ""
-
-    app = create_app(TestConfig)
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "own_database: the test builds its own app and database; skip the shared transactional session",
+    )
+
+
+SEED_PASSWORD = "Seed123!"
+
+
+@lru_cache(maxsize=None)
+def _password_hash(password):
+    """Hash each distinct test password once; the shared salt is harmless here."""
+    return generate_password_hash(password, method=TestingConfig.PASSWORD_HASH_METHOD)
+
+
+TEST_SETTINGS = {
+    "WTF_CSRF_ENABLED": False,
+    "ADMIN_MFA_REQUIRED": False,
+    "LOGIN_RATE_LIMIT_MAX": 3,
+    "LOGIN_RATE_LIMIT_WINDOW_SECONDS": 60,
+    "MAIL_SUPPRESS_SEND": True,
+    "AUTO_MIGRATE": False,
+    "AUTO_CREATE_DB": True,
+    "SECURITY_HEADERS_ENABLED": False,
+    "ERROR_REPORT_EMAIL": "",
+}
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    upload_dir = tmp_path_factory.mktemp("uploads")
+    config = type("TestConfig", (TestingConfig,), dict(TEST_SETTINGS, UPLOAD_FOLDER=str(upload_dir)))
+    # AUTO_CREATE_DB builds the schema and seeds the default document types
+    # inside create_app, on the one StaticPool connection.
+    app = create_app(config)
+    # Compile every template up front so no single test pays for it (Jinja
+    # keeps compiled templates in jinja_env.cache).
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
     return app
 
 
-@pytest.fixture(autouse=True)
-def _setup_db(app):
+@pytest.fixture(scope="session")
+def seed(app):
+    """Baseline rows committed once, outside any test transaction.
+
+    Each test's transaction is rolled back to exactly this state, which is
+    what restoring a pre-populated template database would give, without
+    copying one per test. Tests refer to the rows by the ids returned here.
+    """
     with app.app_context():
-        db.drop_all()
-        db.create_all()
-        yield
+        clerk = User(username="seed-clerk", email="seed-clerk@example.com", role="clerk")
+        admin = User(username="seed-admin", email="seed-admin@example.com", role="admin")
+        for user in (clerk, admin):
+            user.password_hash = _password_hash(SEED_PASSWORD)
+        resident = Resident(
+            first_name="Pedro",
+            last_name="Seed",
+            gender="Male",
+            birth_date=date(1985, 6, 15),
+            address="Seed Address",
+            barangay_id="BRGY-SEED-0001",
+        )
+        doc_type = DocumentType(
+            name="Seed Clearance",
+            description="Baseline document type",
+            requires_photo=False,
+            template_path="generic",
+        )
+        db.session.add_all([clerk, admin, resident, doc_type])
+        db.session.commit()
+        ids = SimpleNamespace(
+            clerk_id=clerk.id,
+            admin_id=admin.id,
+            resident_id=resident.id,
+            document_type_id=doc_type.id,
+        )
         db.session.remove()
+    return ids
 
 
 @pytest.fixture
-def client(app):
-    return app.test_client()
+def db_session(app, seed):
+    """Run the test inside a transaction that is rolled back afterwards.
 
+    The schema is built once per session. ``db.session`` is swapped for a
+    session bound to one connection, and every ``commit()`` made by the app
+    or a fixture only releases a SAVEPOINT within that transaction.
 
-@pytest.fixture
-def db_session(app):
+    Routes run on this same session, so it keeps Flask-SQLAlchemy's defaults
+    (autoflush and expire-on-commit on); turning them off here would test
+    different semantics from production. The factory fixtures never query
+    between ``add`` and ``commit``, so autoflush costs them nothing.
+    """
     with app.app_context():
-        yield db.session
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        app_session = db.session
+        db.session = scoped_session(
+            sessionmaker(
+                bind=connection,
+                join_transaction_mode="create_savepoint",
+                query_cls=db.Query,
+            ),
+            scopefunc=app_session.registry.scopefunc,
+        )
+        app.extensions.pop("document_type_options", None)
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+            db.session = app_session
+            transaction.rollback()
+            connection.close()
+
+
+@pytest.fixture(autouse=True)
+def _setup_db(request):
+    """Wrap every test in ``db_session`` unless it is marked ``own_database``."""
+    if request.node.get_closest_marker("own_database"):
+        return None
+    return request.getfixturevalue("db_session")
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
 
 
 @pytest.fixture
 def make_user(db_session):
-    def _make_user(username, password, role="clerk", email=None):
+    def _make_user(username, password, role="clerk", email=None, commit=True):
         user = User(
             username=username,
             email=email or f"{username}@example.com",
             role=role,
         )
-        user.set_password(password)
+        user.password_hash = _password_hash(password)
         db_session.add(user)
-        db_session.commit()
+        if commit:
+            db_session.commit()
         return user
 
     return _make_user
@@ -76,6 +172,7 @@ def make_resident(db_session):
         birth_date=date(1990, 1, 1),
         address="Test Address",
         barangay_id="BRGY-TEST-0001",
+        commit=True,
     ):
         resident = Resident(
             first_name=first_name,
@@ -86,7 +183,8 @@ def make_resident(db_session):
             barangay_id=barangay_id,
         )
         db_session.add(resident)
-        db_session.commit()
+        if commit:
+            db_session.commit()
         return resident
 
     return _make_resident
@@ -99,6 +197,7 @@ def make_document_type(db_session):
         description="Test document type",
         requires_photo=False,
         template_path="generic",
+        commit=True,
     ):
         doc_type = DocumentType(
             name=name,
@@ -107,7 +206,66 @@ def make_document_type(db_session):
             template_path=template_path,
         )
         db_session.add(doc_type)
-        db_session.commit()
+        if commit:
+            db_session.commit()
         return doc_type
 
     return _make_document_type
+
+
+@pytest.fixture
+def stub_pdf(app, monkeypatch):
+    """Make the routes write a tiny placeholder instead of rendering a PDF.
+
+    For tests about document state rather than PDF content (``test_pdf.py``
+    covers rendering). The file still lands under ``UPLOAD_FOLDER`` and its
+    path is returned the way ``generate_document_pdf`` returns it.
+    """
+
+    def _generate_stub_pdf(doc):
+        rel_path = f"uploads/documents/stub/document_{doc.id}.pdf"
+        abs_path = os.path.join(app.config["UPLOAD_FOLDER"], rel_path[len("uploads/") :])
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        with open(abs_path, "wb") as fh:
+            fh.write(b"%PDF-1.4\n%%EOF\n")
+        return rel_path
+
+    monkeypatch.setattr("barangay_project.routes.generate_document_pdf", _generate_stub_pdf)
+
+
+def _log_in(client, user):
+    """Sign ``client`` in as ``user`` without going through ``/login``.
+
+    ``login_user`` runs in a request context built from the client's environ
+    (so the "strong" session-protection identifier matches) and the resulting
+    session is copied into the client's cookie. Login itself is covered in
+    ``test_auth.py``.
+    """
+    with client.application.test_request_context(environ_base=client.environ_base):
+        login_user(user)
+        values = dict(session)
+    with client.session_transaction() as sess:
+        sess.update(values)
+        sess["last_activity"] = int(time.time())
+
+
+@pytest.fixture
+def clerk_client(client, db_session, seed):
+    _log_in(client, db_session.get(User, seed.clerk_id))
+    return client
+
+
+@pytest.fixture
+def switch_user(client, db_session):
+    """Return a helper that re-signs ``client`` in as another existing user.
+
+    Lets a multi-role test keep one client instead of logging out and
+    posting ``/login`` again.
+    """
+
+    def _switch_user(user_id):
+        with client.session_transaction() as sess:
+            sess.clear()
+        _log_in(client, db_session.get(User, user_id))
+
+    return _switch_user
@@ -1,5 +1,9 @@
 import os
+from datetime import date
 
+import pytest
+
+from barangay_project.config import TestingConfig
 from barangay_project.models import Document
 from barangay_project.pdf_utils import generate_document_pdf
 from barangay_project.time_utils import utcnow
@@ -29,3 +33,58 @@ def test_generate_document_pdf(app, make_resident, make_document_type):
         rel = rel[len("uploads/") :]
     abs_path = os.path.join(app.config["UPLOAD_FOLDER"], rel)
     assert os.path.exists(abs_path)
+
+
+@pytest.mark.own_database
+def test_generate_documents_bulk(tmp_path):
+    # Worker processes open their own engine, so they need a database file
+    # they can reach, not the shared in-memory test connection.
+    from barangay_project.app import create_app
+    from barangay_project.extensions import db
+    from barangay_project.models import DocumentType, Resident
+    from barangay_project.pdf_utils import generate_documents_bulk
+
+    config = type(
+        "BulkPdfConfig",
+        (TestingConfig,),
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'bulk.sqlite'}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+            "AUTO_CREATE_DB": True,
+            "AUTO_MIGRATE": False,
+        },
+    )
+    app = create_app(config)
+    with app.app_context():
+        resident = Resident(
+            first_name="Alex",
+            last_name="Smith",
+            gender="Male",
+            birth_date=date(1990, 1, 1),
+            address="Test Address",
+            barangay_id="BRGY-TEST-0001",
+        )
+        doc_type = DocumentType(name="Generic Certificate", template_path="generic")
+        docs = [
+            Document(
+                resident=resident,
+                document_type=doc_type,
+                status="issued",
+                details=f"Bulk PDF {i}",
+                issue_date=utcnow(),
+            )
+            for i in range(2)
+        ]
+        db.session.add_all(docs)
+        db.session.commit()
+        doc_ids = {d.id for d in docs}
+
+        results = generate_documents_bulk(doc_ids, max_workers=2)
+        db.session.remove()
+
+    assert set(results) == doc_ids
+    for rel_path in results.values():
+        assert rel_path.startswith("uploads/documents/")
+        abs_path = os.path.join(app.config["UPLOAD_FOLDER"], rel_path[len("uploads/") :])
+        assert os.path.exists(abs_path)
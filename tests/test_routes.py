@@ -1,11 +1,30 @@
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
 from barangay_project.models import Document
 from barangay_project.time_utils import utcnow
 
 
-def test_healthz(client):
-    resp = client.get("/healthz")
-    assert resp.status_code == 200
-    data = resp.get_json()
+def _body_contains(resp, *needles):
+    """Scan the response body chunk by chunk, stopping once every needle is seen."""
+    missing = set(needles)
+    overlap = max(map(len, needles)) - 1
+    tail = b""
+    for chunk in resp.iter_encoded():
+        window = tail + chunk
+        missing = {needle for needle in missing if needle not in window}
+        if not missing:
+            return True
+        # Keep enough of the end to catch a needle split across chunks.
+        tail = window[-overlap:] if overlap else b""
+    return not missing
+
+
+def test_healthz(app):
+    # Straight through the WSGI callable: no client cookie jar or session work.
+    environ = EnvironBuilder(path="/healthz").get_environ()
+    app_iter, status, _headers = run_wsgi_app(app.wsgi_app, environ)
+    assert status == "200 OK"
+    data = app.json.loads(b"".join(app_iter))
     assert data["status"] == "ok"
     assert data["db"] is True
 
@@ -16,20 +35,15 @@ def test_index_requires_login(client):
     assert "/login" in resp.headers.get("Location", "")
 
 
-def test_global_search_all(client, make_user, make_resident, make_document_type):
-    make_user("clerk", "Clerk123!", role="clerk")
-    resident = make_resident(first_name="Jane", last_name="Doe")
-    doc_type = make_document_type(name="Residency")
-
-    _ = client.post(
-        "/login",
-        data={"username": "clerk", "password": "Clerk123!"},
-        follow_redirects=False,
-    )
+def test_global_search_all(clerk_client, make_resident, make_document_type):
+    client = clerk_client
+    # Pending objects: the document below commits all three at once.
+    resident = make_resident(first_name="Jane", last_name="Doe", commit=False)
+    doc_type = make_document_type(name="Residency", commit=False)
 
     doc = Document(
-        resident_id=resident.id,
-        document_type_id=doc_type.id,
+        resident=resident,
+        document_type=doc_type,
         status="issued",
         details="Test details",
         issue_date=utcnow(),
@@ -41,5 +55,124 @@ def test_global_search_all(client, make_user, make_resident, make_document_type)
 
     resp = client.get("/search?q=Doe&scope=all", follow_redirects=False)
     assert resp.status_code == 200
-    assert b"Doe" in resp.data
-    assert b"Residency" in resp.data
+    assert _body_contains(resp, b"Doe", b"Residency")
+
+
+def test_add_resident_accepts_barangay_id(clerk_client):
+    client = clerk_client
+
+    form = {
+        "first_name": "Maria",
+        "last_name": "Santos",
+        "gender": "Female",
+        "birth_date": "1990-05-01",
+        "marital_status": "Single",
+        "address": "Test Address",
+        "barangay_id": "brgy-2026-00042",
+    }
+    resp = client.post("/residents/add", data=form, follow_redirects=False)
+    assert resp.status_code == 302
+
+    from barangay_project.models import Resident
+
+    resident = Resident.query.filter_by(last_name="Santos").one()
+    assert resident.barangay_id == "BRGY-2026-00042"
+
+    form.update(first_name="Jose", barangay_id="BRGY-2026-4")
+    resp = client.post("/residents/add", data=form, follow_redirects=False)
+    assert resp.status_code == 200
+    assert b"must follow format" in resp.data
+
+
+def test_list_documents_keyset_pagination(clerk_client, seed):
+    import re
+    from datetime import timedelta
+
+    from barangay_project.extensions import db
+
+    client = clerk_client
+
+    now = utcnow()
+    for i in range(25):
+        db.session.add(
+            Document(
+                resident_id=seed.resident_id,
+                document_type_id=seed.document_type_id,
+                status="issued",
+                details=f"Entry-{i:02d}",
+                issue_date=now - timedelta(days=i),
+            )
+        )
+    db.session.commit()
+
+    first = client.get("/documents").get_data(as_text=True)
+    next_url = re.search(r'href="([^"]*after=[^"]*)">Next<', first).group(1).replace("&amp;", "&")
+    second = client.get(next_url).get_data(as_text=True)
+
+    first_page = set(re.findall(r"Entry-\d\d", first))
+    second_page = set(re.findall(r"Entry-\d\d", second))
+    assert len(first_page) == 20
+    assert second_page == {f"Entry-{i:02d}" for i in range(20, 25)}
+    assert 'href="#">Next<' in second
+
+
+def test_list_documents_date_to_includes_whole_day(clerk_client, seed):
+    from barangay_project.extensions import db
+
+    client = clerk_client
+
+    issued = utcnow().replace(hour=15, minute=30)
+    db.session.add(
+        Document(
+            resident_id=seed.resident_id,
+            document_type_id=seed.document_type_id,
+            status="issued",
+            details="Afternoon entry",
+            issue_date=issued,
+        )
+    )
+    db.session.commit()
+
+    day = issued.strftime("%Y-%m-%d")
+    resp = client.get(f"/documents?from={day}&to={day}")
+    assert b"Afternoon entry" in resp.data
+
+
+def test_resident_lookup_returns_matches(clerk_client, make_resident):
+    client = clerk_client
+    resident = make_resident(first_name="Jane", last_name="Rivera", barangay_id="BRGY-2026-00007")
+    make_resident(first_name="Mark", last_name="Cruz", barangay_id="BRGY-2026-00008")
+
+    data = client.get("/api/residents/search?q=rive").get_json()
+    assert data == {
+        "results": [{"id": resident.id, "text": "Rivera, Jane (BRGY-2026-00007)"}],
+        "has_more": False,
+    }
+    assert client.get("/api/residents/search?q=r").get_json()["results"] == []
+
+
+def test_csv_export_is_audited_when_download_aborts(clerk_client, seed):
+    from barangay_project.extensions import db
+    from barangay_project.models import TransactionLog
+
+    client = clerk_client
+    for i in range(3):
+        db.session.add(
+            Document(
+                resident_id=seed.resident_id,
+                document_type_id=seed.document_type_id,
+                status="issued",
+                details=f"Export {i}",
+                issue_date=utcnow(),
+            )
+        )
+    db.session.commit()
+
+    resp = client.get("/reports/export/csv")
+    body = iter(resp.response)
+    assert next(body).startswith(b"Issue Date")
+    resp.close()  # the client went away after the header row
+
+    entry = TransactionLog.query.filter_by(action="Exported reports (CSV)").one()
+    assert entry.meta["completed"] is False
+    assert entry.meta["rows"] == 0
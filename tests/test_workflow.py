@@ -1,32 +1,19 @@
 import os
 from datetime import date
 
-from barangay_project.extensions import db
 from barangay_project.models import Document
 
 
-def _login(client, username, password):
-    return client.post(
-        "/login",
-        data={"username": username, "password": password},
-        follow_redirects=False,
-    )
-
-
-def test_document_workflow(client, app, make_user, make_resident, make_document_type):
-    make_user("clerk", "Clerk123!", role="clerk")
-    make_user("boss", "Admin123!", role="admin")
-
-    resident = make_resident(birth_date=date(1990, 1, 1))
-    doc_type = make_document_type(name="Test Clearance", requires_photo=False)
-
-    _login(client, "clerk", "Clerk123!")
+def test_document_workflow(clerk_client, app, seed, switch_user, stub_pdf):
+    # One client throughout: the clerk drafts, then the same cookie jar is
+    # switched to the admin, who issues it.
+    client = clerk_client
 
     resp = client.post(
         "/documents/issue",
         data={
-            "resident_id": resident.id,
-            "document_type_id": doc_type.id,
+            "resident_id": seed.resident_id,
+            "document_type_id": seed.document_type_id,
             "details": "Test document",
             "issue_date": date.today().isoformat(),
         },
@@ -34,28 +21,22 @@ def test_document_workflow(client, app, make_user, make_resident, make_document_
     )
     assert resp.status_code == 302
 
+    # Test-client requests reuse this test's app context, so the routes commit
+    # on the same session; expire-on-commit makes ``doc`` reload its columns
+    # on the next attribute access, with no extra get()/refresh().
     doc = Document.query.first()
     assert doc is not None
     assert doc.status == "draft"
 
-    resp = client.post(f"/documents/{doc.id}/request-approval", follow_redirects=False)
-    assert resp.status_code == 302
-    doc = db.session.get(Document, doc.id)
-    assert doc.status == "pending"
-
-    client.get("/logout", follow_redirects=False)
-    _login(client, "boss", "Admin123!")
+    assert doc.created_by_id == seed.clerk_id
 
-    resp = client.post(f"/documents/{doc.id}/approve", follow_redirects=False)
-    assert resp.status_code == 302
-    doc = db.session.get(Document, doc.id)
-    assert doc.status == "approved"
+    switch_user(seed.admin_id)
 
     resp = client.post(f"/documents/{doc.id}/issue", follow_redirects=False)
     assert resp.status_code == 302
-    doc = db.session.get(Document, doc.id)
     assert doc.status == "issued"
-    assert doc.file_path
+    assert doc.issued_by_id == seed.admin_id
+    assert doc.file_path.startswith("uploads/documents/stub/")
 
     rel = doc.file_path
     if rel.startswith("uploads/"):
@@ -4,8 +4,20 @@ This file exists only to make running the app unambiguous.
 
 Usage:
   flask --app wsgi run
+
+``app`` is built on first access (PEP 562 module ``__getattr__``), so merely
+importing this module does not run ``create_app()``.
 """
 
 from barangay_project.app import create_app
 
-app = create_app()
+_app = None
+
+
+def __getattr__(name):
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app